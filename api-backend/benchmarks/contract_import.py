@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark POST /api/contracts/import against a local mongod.
+
+Streams a synthetic NDJSON body of N contracts (20,000 by default) through
+the import route in-process, once per chunk size, and reports rows per
+second. Each run starts from empty contracts and contract_activity
+collections in a throwaway database. Requires a running mongod.
+Usage: python -m benchmarks.contract_import [--rows N] [--chunk-sizes 500,1000,5000]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+import httpx
+import orjson
+from fastapi import FastAPI
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from db.mongodb import MongoDB
+from routes.contracts import router
+from utils.auth import get_current_user
+
+TYPES = ["Property Sale", "Commercial Lease", "Construction Escrow", "Investment Property"]
+BODY_CHUNK_BYTES = 64 * 1024
+
+
+def make_rows(count: int) -> bytes:
+    rng = random.Random(42)
+    lines = [
+        orjson.dumps({
+            "title": f"Import {i}",
+            "type": rng.choice(TYPES),
+            "buyer": f"Buyer {i}",
+            "buyerEmail": f"buyer{i}@example.com",
+            "seller": f"Seller {i}",
+            "propertyAddress": f"{rng.randint(1, 9999)} Harbor St",
+            "escrowNumber": f"ESC-{i:07d}",
+            "value": float(rng.randint(100, 5000) * 1000),
+        })
+        for i in range(count)
+    ]
+    return b"\n".join(lines) + b"\n"
+
+
+async def stream(body: bytes):
+    for offset in range(0, len(body), BODY_CHUNK_BYTES):
+        yield body[offset:offset + BODY_CHUNK_BYTES]
+
+
+async def main(rows: int, chunk_sizes: list) -> None:
+    uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+    client = AsyncIOMotorClient(uri)
+    db = client[os.getenv("BENCH_DB_NAME", "escra_bench_import")]
+    MongoDB.client, MongoDB.db = client, db
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_current_user] = lambda: {"user_id": "bench-user", "role": "editor"}
+    body = make_rows(rows)
+    print(f"{rows:,} rows, {len(body) / 1e6:.1f} MB NDJSON\n")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        print(f"{'chunk size':>10} {'seconds':>8} {'rows/s':>9}")
+        for chunk_size in chunk_sizes:
+            await db.contracts.drop()
+            await db.contract_activity.drop()
+            await MongoDB.create_indexes()
+
+            started = time.perf_counter()
+            response = await http.post(
+                f"/api/contracts/import?chunkSize={chunk_size}",
+                content=stream(body),
+                headers={"Content-Type": "application/x-ndjson"},
+            )
+            elapsed = time.perf_counter() - started
+            result = response.json()
+            if result.get("failed"):
+                print(f"  {result['failed']} rows failed: {result['errors'][:3]}")
+            print(f"{chunk_size:>10} {elapsed:>8.2f} {result['inserted'] / elapsed:>9,.0f}")
+
+    await db.contracts.drop()
+    await db.contract_activity.drop()
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--chunk-sizes", default="500,1000,5000")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, [int(size) for size in args.chunk_sizes.split(",")]))
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark contract search: unanchored $regex versus the full-text index.
+
+Seeds a throwaway database with synthetic contracts (1M by default), creates
+the application indexes, then times the list query that GET /api/contracts
+runs for a handful of search terms in both search modes, for an admin and a
+regular user. Requires a running mongod.
+Usage: python -m benchmarks.contract_search [--contracts N] [--reseed]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from db.mongodb import MongoDB
+from routes.contracts import CONTRACT_LIST_PROJECTION, build_contract_list_query
+
+FIRST_NAMES = ["James", "Maria", "Robert", "Linda", "Wei", "Aisha", "Carlos", "Priya", "Olga", "Kwame"]
+LAST_NAMES = ["Smith", "Garcia", "Johnson", "Chen", "Okafor", "Patel", "Novak", "Silva", "Kim", "Brown"]
+STREETS = ["Oak", "Maple", "Harbor", "Sunset", "Ridge", "Willow", "Lake", "Cedar", "Mission", "Elm"]
+TYPES = ["Property Sale", "Commercial Lease", "Construction Escrow", "Investment Property"]
+STATUSES = ["Initiation", "Preparation", "Wire Details", "In Review", "Signatures", "Funds Disbursed", "Complete"]
+SEARCH_TERMS = ["Garcia", "Harbor", "Okafor Chen", "ESC-0424242"]
+BATCH_SIZE = 10000
+USER_COUNT = 500
+
+
+def person(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def make_contract(i: int, rng: random.Random, base: datetime) -> dict:
+    street = rng.choice(STREETS)
+    updated = base + timedelta(minutes=i)
+    return {
+        "id": f"CNT-BENCH-{i:08d}",
+        "title": f"{street} Street {rng.choice(TYPES)}",
+        "type": rng.choice(TYPES),
+        "status": rng.choice(STATUSES),
+        "buyer": person(rng),
+        "seller": person(rng),
+        "agent": person(rng),
+        "propertyAddress": f"{rng.randint(1, 9999)} {street} St",
+        "escrowNumber": f"ESC-{i:07d}",
+        "value": float(rng.randint(100, 5000) * 1000),
+        "created_by": f"user-{rng.randrange(USER_COUNT)}",
+        "shared_with": [f"user-{rng.randrange(USER_COUNT)}"],
+        "createdAt": updated,
+        "updatedAt": updated,
+        "documentsList": [],
+        "activityLog": [],
+        "comments": [],
+    }
+
+
+async def seed(db, count: int) -> None:
+    rng = random.Random(42)
+    base = datetime(2020, 1, 1)
+    await db.contracts.drop()
+    started = time.perf_counter()
+    for offset in range(0, count, BATCH_SIZE):
+        batch = [make_contract(i, rng, base) for i in range(offset, min(offset + BATCH_SIZE, count))]
+        await db.contracts.insert_many(batch, ordered=False)
+    print(f"Seeded {count:,} contracts in {time.perf_counter() - started:.1f}s")
+
+
+async def time_query(db, query: dict, sort: list, repeats: int) -> tuple:
+    """Return (best ms for count + first page, total) over several runs."""
+    best = None
+    total = 0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        total = await db.contracts.count_documents(query)
+        await db.contracts.find(query, CONTRACT_LIST_PROJECTION).sort(sort).limit(21).to_list(length=21)
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, total
+
+
+async def main(count: int, reseed: bool, repeats: int) -> None:
+    uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
+    client = AsyncIOMotorClient(uri)
+    db = client[os.getenv("BENCH_DB_NAME", "escra_bench")]
+
+    if reseed or await db.contracts.estimated_document_count() != count:
+        await seed(db, count)
+
+    MongoDB.client, MongoDB.db = client, db
+    started = time.perf_counter()
+    await MongoDB.create_indexes()
+    print(f"Indexes ready in {time.perf_counter() - started:.1f}s\n")
+
+    users = {
+        "admin": {"user_id": "admin", "is_admin": True},
+        "user": {"user_id": "user-7", "is_admin": False},
+    }
+    print(f"{'term':<14} {'who':<6} {'substring ms':>13} {'text ms':>9} {'speedup':>8} {'hits (sub/text)':>18}")
+    for term in SEARCH_TERMS:
+        for who, current_user in users.items():
+            sort = [("updatedAt", -1), ("id", -1)]
+            substring_query = build_contract_list_query(current_user, search=term, search_mode="substring")
+            text_query = build_contract_list_query(current_user, search=term, search_mode="text")
+            substring_ms, substring_hits = await time_query(db, substring_query, sort, repeats)
+            text_ms, text_hits = await time_query(db, text_query, sort, repeats)
+            print(
+                f"{term:<14} {who:<6} {substring_ms:>13.1f} {text_ms:>9.1f} "
+                f"{substring_ms / text_ms:>7.1f}x {substring_hits:>8,}/{text_hits:<8,}"
+            )
+
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contracts", type=int, default=1_000_000)
+    parser.add_argument("--reseed", action="store_true")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.contracts, args.reseed, args.repeats))
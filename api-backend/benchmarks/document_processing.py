@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark the background document processing pipeline on a folder of PDFs.
+
+Runs process_document over every PDF in the folder, first serially on a
+sample and then on a ProcessPoolExecutor, and reports documents and pages
+per second. Without a folder, 1,000 synthetic PDFs (1-40 pages of text
+each) are generated in a temporary directory. Thumbnails are written to a
+throwaway blob store; every document gets its page count, text and a
+thumbnail. Pass --object-streams to write the synthetic PDFs with
+compressed object streams, as most current PDF writers do.
+Usage: python -m benchmarks.document_processing [folder] [--generate N] [--object-streams] [--workers N]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+
+from services.document_processing import DOCUMENT_WORKERS, process_document
+
+SERIAL_SAMPLE = 50
+
+
+def make_pdf(pages: int, rng: random.Random) -> bytes:
+    """Build a minimal, valid, uncompressed PDF with one line of text per page."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(pages))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+    for i in range(pages):
+        content = f"BT /F1 12 Tf 72 720 Td (Escrow page {i + 1} ref {rng.randrange(10**9)}) Tj ET".encode()
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+            f"/Resources << /Font << /F1 << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> >> >> >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def generate(folder: str, count: int, object_streams: bool = False) -> None:
+    rng = random.Random(7)
+    for i in range(count):
+        path = os.path.join(folder, f"sample-{i:04d}.pdf")
+        data = make_pdf(rng.randint(1, 40), rng)
+        if object_streams:
+            # Rewrite with page objects inside compressed object streams
+            with fitz.open(stream=data, filetype="pdf") as pdf:
+                pdf.save(path, garbage=1, deflate=1, use_objstms=1)
+        else:
+            with open(path, "wb") as out:
+                out.write(data)
+
+
+def main(folder: str, workers: int) -> None:
+    paths = sorted(os.path.join(folder, name) for name in os.listdir(folder) if name.lower().endswith(".pdf"))
+    megabytes = sum(os.path.getsize(path) for path in paths) / 1e6
+    blob_root = tempfile.mkdtemp(prefix="bench-blobs-")
+    print(f"{len(paths):,} PDFs, {megabytes:.1f} MB, {workers} worker(s), {os.cpu_count()} core(s)")
+
+    sample = paths[:SERIAL_SAMPLE]
+    started = time.perf_counter()
+    for path in sample:
+        process_document(path, blob_root)
+    serial = len(sample) / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(process_document, paths, [blob_root] * len(paths), chunksize=8))
+    elapsed = time.perf_counter() - started
+
+    pages = sum(result["pages"] or 0 for result in results)
+    texts = sum(1 for result in results if result["text"])
+    thumbnails = sum(1 for result in results if result["thumbnailHash"])
+    print(f"pages found in {sum(1 for result in results if result['pages'])}, text in {texts}, thumbnails for {thumbnails}")
+    print(f"serial ({len(sample)} docs)   {serial:10.1f} docs/s")
+    print(f"pool  ({len(paths)} docs)  {len(paths) / elapsed:10.1f} docs/s  {pages / elapsed:10.1f} pages/s  ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", nargs="?")
+    parser.add_argument("--generate", type=int, default=1000, help="synthetic PDFs to create when no folder is given")
+    parser.add_argument("--object-streams", action="store_true", help="write synthetic PDFs with compressed object streams")
+    parser.add_argument("--workers", type=int, default=DOCUMENT_WORKERS)
+    args = parser.parse_args()
+    if args.folder:
+        main(args.folder, args.workers)
+    else:
+        with tempfile.TemporaryDirectory(prefix="bench-pdfs-") as folder:
+            generate(folder, args.generate, args.object_streams)
+            main(folder, args.workers)
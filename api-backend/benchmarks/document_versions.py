@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Measure storage for document revision chains stored as content-defined chunks.
+
+Each chain is a folder of revisions of one document, read in file name
+order. For every chain the report compares a full copy per revision (the
+previous behaviour) against the unique content-defined chunks, and against
+fixed-size 64 KiB blocks to show what content-defined boundaries add.
+Chunking throughput is measured on the way.
+
+Without folders, a synthetic 30 MB agreement with ten redline rounds is
+generated: each round rewrites a few page objects, inserts one and saves
+the whole file again, which shifts every later byte offset and rewrites the
+offset table. Real chains can share more or less than this; pass folders of
+real revisions to measure them.
+Usage: python -m benchmarks.document_versions [chain_folder ...] [--rounds N] [--megabytes N]
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import tempfile
+import time
+from typing import List, Tuple
+
+from services.document_versions import chunk_boundaries
+
+FIXED_BLOCK = 64 * 1024
+
+
+def serialize(objects: List[Tuple[int, bytes]]) -> bytes:
+    """Write numbered objects as a PDF-like file with an offset table at the end."""
+    out = bytearray(b"%PDF-1.7\n")
+    offsets = []
+    for number, body in objects:
+        offsets.append(len(out))
+        out += b"%d 0 obj\n<< /Length %d /Filter /FlateDecode >>\nstream\n" % (number, len(body))
+        out += body + b"\nendstream\nendobj\n"
+    out += b"xref\n0 %d\n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d >>\n%%%%EOF\n" % (len(objects) + 1)
+    return bytes(out)
+
+
+def generate_chain(folder: str, rounds: int, megabytes: int) -> None:
+    """Write a base agreement and ``rounds`` redlined revisions of it."""
+    rng = random.Random(11)
+    # Compressed page contents and images look like random bytes. Editors keep
+    # object numbers, so a new object gets the next free number.
+    objects = []
+    while sum(len(body) for _, body in objects) < megabytes * 1_000_000:
+        objects.append((len(objects) + 1, rng.randbytes(rng.choice((8_000, 30_000, 120_000, 600_000)))))
+    for round_number in range(rounds + 1):
+        if round_number:
+            for _ in range(rng.randint(2, 5)):
+                index = rng.randrange(len(objects))
+                objects[index] = (objects[index][0], rng.randbytes(rng.randint(5_000, 40_000)))
+            new_object = (max(number for number, _ in objects) + 1, rng.randbytes(rng.randint(5_000, 40_000)))
+            objects.insert(rng.randrange(len(objects)), new_object)
+        with open(os.path.join(folder, f"rev-{round_number:02d}.pdf"), "wb") as out:
+            out.write(serialize(objects))
+
+
+def measure(folder: str) -> None:
+    names = sorted(name for name in os.listdir(folder) if os.path.isfile(os.path.join(folder, name)))
+    logical = 0
+    chunks = {}
+    blocks = {}
+    chunk_seconds = 0.0
+    for name in names:
+        with open(os.path.join(folder, name), "rb") as file:
+            data = file.read()
+        logical += len(data)
+
+        started = time.perf_counter()
+        ends = chunk_boundaries(data)
+        chunk_seconds += time.perf_counter() - started
+
+        start = 0
+        for end in ends:
+            chunks[hashlib.sha256(data[start:end]).digest()] = end - start
+            start = end
+        for start in range(0, len(data), FIXED_BLOCK):
+            block = data[start:start + FIXED_BLOCK]
+            blocks[hashlib.sha256(block).digest()] = len(block)
+
+    stored = sum(chunks.values())
+    fixed = sum(blocks.values())
+    print(f"{folder}: {len(names)} revisions, {logical / 1e6:.1f} MB as full copies")
+    print(f"  content-defined chunks {stored / 1e6:10.1f} MB  {1 - stored / logical:6.1%} saved  "
+          f"({len(chunks)} chunks, avg {stored / max(len(chunks), 1) / 1024:.0f} KiB)")
+    print(f"  fixed 64 KiB blocks    {fixed / 1e6:10.1f} MB  {1 - fixed / logical:6.1%} saved")
+    print(f"  chunking               {logical / 1e6 / chunk_seconds:10.1f} MB/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("chains", nargs="*", help="folders of revisions, one folder per document")
+    parser.add_argument("--rounds", type=int, default=10, help="redline rounds in the synthetic chain")
+    parser.add_argument("--megabytes", type=int, default=30, help="size of the synthetic agreement")
+    args = parser.parse_args()
+    if args.chains:
+        for chain in args.chains:
+            measure(chain)
+    else:
+        with tempfile.TemporaryDirectory(prefix="bench-versions-") as folder:
+            generate_chain(folder, args.rounds, args.megabytes)
+            measure(folder)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark response serialisation for the hot contract endpoints.
+
+Compares FastAPI's default path (response_model validation where the route
+declares one, jsonable_encoder, stdlib json via JSONResponse) with returning
+ORJSONResponse directly, for a 20-row contracts list page and for a contract
+detail document with 500 activity log entries.
+Usage: python -m benchmarks.serialization [iterations]
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from routes.contracts import ContractListResponse
+from utils.responses import ORJSONResponse
+
+
+def list_payload(rows: int = 20) -> dict:
+    now = datetime.utcnow()
+    contracts = [
+        {
+            "id": f"CNT-{i:06d}",
+            "title": f"Harbor Street Property Sale {i}",
+            "parties": "Maria Garcia & James Chen & Priya Patel",
+            "status": "In Review",
+            "updated": "2 hours ago",
+            "updatedAt": (now - timedelta(hours=i)).isoformat(),
+            "value": "$1,250,000",
+            "documents": 4,
+            "type": "Property Sale",
+            "milestone": "Inspection",
+            "closingDate": "2026-11-30",
+            "dueDate": "2026-11-15",
+        }
+        for i in range(rows)
+    ]
+    return {
+        "contracts": contracts,
+        "pagination": {"total": 4210, "limit": rows, "pages": 211, "page": 1, "next": "eyJmIjoidXBkYXRlZEF0In0", "prev": None},
+    }
+
+
+def detail_payload(activity_entries: int = 500) -> dict:
+    now = datetime.utcnow()
+    return {
+        "id": "CNT-000042",
+        "title": "Harbor Street Property Sale",
+        "type": "Property Sale",
+        "status": "Signatures",
+        "buyer": "Maria Garcia",
+        "seller": "James Chen",
+        "agent": "Priya Patel",
+        "value": 1250000.0,
+        "closingDate": "2026-11-30",
+        "createdAt": now - timedelta(days=90),
+        "updatedAt": now,
+        "created_by": "1718900000000",
+        "shared_with": ["1718900000001", "1718900000002"],
+        "documentsList": [
+            {"id": str(ObjectId()), "name": f"doc-{i}.pdf", "type": "application/pdf", "status": "uploaded",
+             "size": 1048576, "url": f"/api/contracts/CNT-000042/documents/doc-{i}", "uploadedAt": now}
+            for i in range(10)
+        ],
+        "comments": [
+            {"id": str(ObjectId()), "author": "Escrow Officer", "content": "Wire instructions verified.",
+             "timestamp": now, "avatarColor": "#4B5563", "textColor": "#FFFFFF"}
+            for _ in range(25)
+        ],
+        "activityLog": [
+            {"id": str(ObjectId()), "action": "Contract updated", "user": "System",
+             "timestamp": now - timedelta(minutes=i), "details": "Updated fields: notes, updatedAt"}
+            for i in range(activity_entries)
+        ],
+        "parties": "Maria Garcia & James Chen & Priya Patel",
+        "updated": "just now",
+        "documents": 10,
+    }
+
+
+def default_list(payload):
+    model = ContractListResponse(**payload)
+    return JSONResponse(jsonable_encoder(model)).body
+
+
+def default_detail(payload):
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def orjson_response(payload):
+    return ORJSONResponse(payload).body
+
+
+def time_per_call(func, payload, iterations: int) -> float:
+    """Return the mean wall time of func(payload) in microseconds."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(payload)
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main(iterations: int) -> None:
+    cases = [
+        ("20-row list", list_payload(), default_list),
+        ("detail, 500 activity entries", detail_payload(), default_detail),
+    ]
+    print(f"Iterations: {iterations}")
+    for label, payload, default in cases:
+        baseline = time_per_call(default, payload, iterations)
+        fast = time_per_call(orjson_response, payload, iterations)
+        size = len(orjson_response(payload))
+        print(f"\n{label} ({size:,} bytes)")
+        print(f"  validate + jsonable_encoder + json  {baseline:10.1f} µs")
+        print(f"  ORJSONResponse                      {fast:10.1f} µs  ({baseline / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
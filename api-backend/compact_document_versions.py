@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Compact stored document versions and report how much storage they use.
+
+Every contract document version is recorded in document_versions as a list
+of content-defined chunks, while the bytes of each upload are also written
+as a full blob. Once a newer version replaces it, that full blob is no longer
+needed: downloads of old versions are rebuilt from the chunks. This script
+
+1. chunks any version record that has no chunks yet
+2. deletes the full blob of every version that is no longer current, once
+   all of its chunks are confirmed on disk (blobs still referenced by a
+   contract document, a thumbnail or the documents collection are kept)
+3. deletes blobs and chunks nothing refers to any more, such as the files of
+   deleted contracts, once they are older than ORPHAN_GRACE_HOURS (so an
+   upload that is still being attached is never collected)
+4. reports logical size (a full copy per version) against what is stored
+
+Run it periodically, e.g. nightly. It is idempotent.
+
+Usage:
+  python compact_document_versions.py            # compact and report
+  python compact_document_versions.py --dry-run  # only report what would be freed
+"""
+import argparse
+import asyncio
+import os
+import time
+from collections import defaultdict
+from db.mongodb import MongoDB
+from services.blob_store import blob_store
+from services.document_versions import CHUNK_STORE_DIR, chunk_file, chunk_store
+
+# Unreferenced files younger than this may belong to an upload still in progress
+ORPHAN_GRACE_HOURS = float(os.getenv("ORPHAN_GRACE_HOURS", "24"))
+
+
+def format_size(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+async def referenced_blobs(db):
+    """Return the hashes of every full blob something still serves directly."""
+    hashes = set()
+    async for contract in db.contracts.find({}, {"documentsList.hash": 1, "documentsList.thumbnailHash": 1}):
+        for document in contract.get("documentsList", []):
+            hashes.update(value for value in (document.get("hash"), document.get("thumbnailHash")) if value)
+    async for document in db.documents.find({"metadata.hash": {"$exists": True}}, {"metadata.hash": 1}):
+        hashes.add(document["metadata"]["hash"])
+    return hashes
+
+
+def chunks_complete(chunks, size: int) -> bool:
+    if sum(chunk_size for _, chunk_size in chunks) != size:
+        return False
+    for digest, chunk_size in chunks:
+        try:
+            if os.path.getsize(chunk_store.path_for(digest)) != chunk_size:
+                return False
+        except FileNotFoundError:
+            return False
+    return True
+
+
+async def chunk_missing(db, dry_run: bool = False):
+    chunked = 0
+    async for record in db.document_versions.find({"chunks": None}, {"_id": 1, "hash": 1}):
+        path = blob_store.path_for(record["hash"])
+        if not os.path.exists(path):
+            print(f"  {record['hash']}: no full blob and no chunks, cannot be recovered")
+            continue
+        if not dry_run:
+            chunks = await asyncio.to_thread(chunk_file, path, CHUNK_STORE_DIR)
+            await db.document_versions.update_one({"_id": record["_id"]}, {"$set": {"chunks": chunks}})
+        chunked += 1
+    action = "Would chunk" if dry_run else "Chunked"
+    print(f"{action} {chunked} version(s)")
+
+
+async def remove_superseded_blobs(db, dry_run: bool = False):
+    records = await db.document_versions.find(
+        {"chunks": {"$ne": None}}, {"_id": 0, "hash": 1, "size": 1, "chunks": 1}
+    ).to_list(length=None)
+    # Read references after listing candidates, so a version made current meanwhile is kept
+    referenced = await referenced_blobs(db)
+
+    removed = 0
+    freed = 0
+    seen = set()
+    for record in records:
+        digest = record["hash"]
+        if digest in referenced or digest in seen:
+            continue
+        seen.add(digest)
+        path = blob_store.path_for(digest)
+        if not os.path.exists(path):
+            continue
+        if not chunks_complete(record["chunks"], record["size"]):
+            print(f"  {digest}: chunks incomplete, keeping full blob")
+            continue
+        if not dry_run:
+            os.unlink(path)
+        removed += 1
+        freed += record["size"]
+
+    action = "Would remove" if dry_run else "Removed"
+    print(f"{action} {removed} superseded full blob(s), {format_size(freed)}")
+
+
+def stored_files(root: str, older_than: float):
+    """List ``(digest, path, size)`` of the files in a store last touched before ``older_than``."""
+    files = []
+    if not os.path.isdir(root):
+        return files
+    # Blobs live in <root>/<aa>/<bb>/<digest>; staging and the chunk store are skipped
+    for first in os.scandir(root):
+        if not (first.is_dir() and len(first.name) == 2):
+            continue
+        for second in os.scandir(first.path):
+            if not second.is_dir():
+                continue
+            for entry in os.scandir(second.path):
+                if len(entry.name) != 64 or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if stat.st_mtime < older_than:
+                    files.append((entry.name, entry.path, stat.st_size))
+    return files
+
+
+def remove_files(files, keep, dry_run: bool = False):
+    removed = 0
+    freed = 0
+    for digest, path, size in files:
+        if digest in keep:
+            continue
+        if not dry_run:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                continue
+        removed += 1
+        freed += size
+    return removed, freed
+
+
+async def remove_unreferenced(db, dry_run: bool = False):
+    older_than = time.time() - ORPHAN_GRACE_HOURS * 3600
+    # List candidates before reading references, so anything attached meanwhile is kept
+    blobs = await asyncio.to_thread(stored_files, blob_store.root, older_than)
+    chunks = await asyncio.to_thread(stored_files, chunk_store.root, older_than)
+
+    referenced = await referenced_blobs(db)
+    referenced_chunks = set()
+    async for record in db.document_versions.find({}, {"_id": 0, "hash": 1, "chunks": 1}):
+        referenced.add(record["hash"])
+        referenced_chunks.update(digest for digest, _ in record.get("chunks") or [])
+
+    # Analysis results are kept while their document is; they name its thumbnail
+    orphaned_analysis = []
+    async for analysis in db.document_analysis.find({}, {"_id": 1, "hash": 1, "thumbnailHash": 1}):
+        if analysis["hash"] in referenced:
+            if analysis.get("thumbnailHash"):
+                referenced.add(analysis["thumbnailHash"])
+        else:
+            orphaned_analysis.append(analysis["_id"])
+    if orphaned_analysis and not dry_run:
+        await db.document_analysis.delete_many({"_id": {"$in": orphaned_analysis}})
+
+    removed_blobs, freed_blobs = await asyncio.to_thread(remove_files, blobs, referenced, dry_run)
+    removed_chunks, freed_chunks = await asyncio.to_thread(remove_files, chunks, referenced_chunks, dry_run)
+
+    action = "Would remove" if dry_run else "Removed"
+    print(f"{action} {removed_blobs} unreferenced blob(s), {format_size(freed_blobs)}")
+    print(f"{action} {removed_chunks} unreferenced chunk(s), {format_size(freed_chunks)}")
+    print(f"{action} {len(orphaned_analysis)} analysis result(s) of removed documents")
+
+
+async def report_storage(db):
+    chains = defaultdict(lambda: {"versions": 0, "logical": 0, "chunks": {}})
+    async for record in db.document_versions.find({}, {"_id": 0, "contract_id": 1, "document_id": 1, "size": 1, "chunks": 1}):
+        chain = chains[(record["contract_id"], record["document_id"])]
+        chain["versions"] += 1
+        chain["logical"] += record["size"]
+        chain["chunks"].update((digest, size) for digest, size in record.get("chunks") or [])
+
+    if not chains:
+        print("No versioned documents")
+        return
+
+    logical = sum(chain["logical"] for chain in chains.values())
+    unique_chunks = {}
+    for chain in chains.values():
+        unique_chunks.update(chain["chunks"])
+    chunk_bytes = sum(unique_chunks.values())
+    current = sum(
+        os.path.getsize(blob_store.path_for(digest))
+        for digest in await referenced_blobs(db)
+        if os.path.exists(blob_store.path_for(digest))
+    )
+
+    print(f"{len(chains)} versioned document(s), {sum(chain['versions'] for chain in chains.values())} version(s)")
+    print(f"  full copy per version: {format_size(logical)}")
+    print(f"  unique chunks:         {format_size(chunk_bytes)} ({1 - chunk_bytes / max(logical, 1):.1%} saved)")
+    print(f"  current full blobs:    {format_size(current)} (all contract documents, served directly)")
+
+    print("\nLargest revision chains:")
+    largest = sorted(chains.items(), key=lambda item: item[1]["logical"], reverse=True)[:10]
+    for (contract_id, document_id), chain in largest:
+        stored = sum(chain["chunks"].values())
+        print(
+            f"  {contract_id}/{document_id}: {chain['versions']} versions, "
+            f"{format_size(chain['logical'])} -> {format_size(stored)} ({1 - stored / max(chain['logical'], 1):.1%} saved)"
+        )
+
+
+async def compact_document_versions(dry_run: bool = False):
+    # Connect to the database
+    await MongoDB.connect_to_database()
+
+    db = MongoDB.get_database()
+    await MongoDB.create_indexes()
+
+    print("Chunking versions...")
+    await chunk_missing(db, dry_run=dry_run)
+    print("\nRemoving superseded full blobs...")
+    await remove_superseded_blobs(db, dry_run=dry_run)
+    print("\nRemoving unreferenced blobs and chunks...")
+    await remove_unreferenced(db, dry_run=dry_run)
+    print("\nStorage:")
+    await report_storage(db)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact stored document versions and report storage savings")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be freed without deleting")
+    args = parser.parse_args()
+    asyncio.run(compact_document_versions(dry_run=args.dry_run))
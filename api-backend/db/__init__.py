@@ -1,5 +1,5 @@
 """MongoDB helpers for the ESCRa backend."""
 
-from .mongodb import MongoDB
+from .mongodb import MongoDB, CONTRACT_SORT_FIELDS
 
-__all__ = ["MongoDB"]
+__all__ = ["MongoDB", "CONTRACT_SORT_FIELDS"]
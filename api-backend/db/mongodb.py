@@ -11,6 +11,25 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+# Sort keys the contracts list accepts; each one is backed by compound indexes
+# for the admin (unfiltered) and per-user access predicates below.
+CONTRACT_SORT_FIELDS = ("updatedAt", "createdAt", "closingDate", "value", "title")
+
+# Indexes superseded by the compound access indexes. Per-user status and type
+# filters are applied to the rows fetched through the access + sort indexes,
+# which also serve their counts (see fix_indexes.py --explain)
+REDUNDANT_CONTRACT_INDEXES = (
+    "status_1",
+    "created_by_1",
+    "shared_with_1",
+    *(
+        f"{access_field}_1_{filter_field}_1_updatedAt_-1_id_-1"
+        for access_field in ("created_by", "shared_with")
+        for filter_field in ("status", "type")
+    ),
+)
+
+
 class MongoDB:
     """Centralised MongoDB client manager."""
 
@@ -53,15 +72,59 @@ class MongoDB:
 
         try:
             await cls.db.contracts.create_index("id", unique=True)
-            await cls.db.contracts.create_index("status")
             await cls.db.contracts.create_index("created_at")
             await cls.db.contracts.create_index("updated_at")
             await cls.db.contracts.create_index("parties.id")
             await cls.db.contracts.create_index("documents.id")
             await cls.db.contracts.create_index("tasks.id")
             await cls.db.contracts.create_index("signatures.id")
-            await cls.db.contracts.create_index("created_by")
-            await cls.db.contracts.create_index("shared_with")
+            # Documents still waiting for background processing after a restart
+            await cls.db.contracts.create_index("documentsList.status")
+            # Access predicate ($or of created_by / shared_with) crossed with the
+            # sort keys, with id as the keyset tiebreaker, so per-user lists are
+            # answered by a merge of two index scans instead of an in-memory sort
+            for access_field in ("created_by", "shared_with"):
+                for sort_field in CONTRACT_SORT_FIELDS:
+                    await cls.db.contracts.create_index(
+                        [(access_field, 1), (sort_field, -1), ("id", -1)]
+                    )
+
+            # Admins list without the access predicate; status and type lead
+            # their own indexes so admin totals for those filters are index-only
+            for sort_field in CONTRACT_SORT_FIELDS:
+                await cls.db.contracts.create_index([(sort_field, -1), ("id", -1)])
+            for filter_field in ("status", "type"):
+                await cls.db.contracts.create_index(
+                    [(filter_field, 1), ("updatedAt", -1), ("id", -1)]
+                )
+            await cls.db.contracts.create_index(
+                [
+                    ("title", "text"),
+                    ("buyer", "text"),
+                    ("seller", "text"),
+                    ("agent", "text"),
+                    ("propertyAddress", "text"),
+                    ("escrowNumber", "text"),
+                ],
+                name="contract_text_search",
+                weights={
+                    "title": 10,
+                    "escrowNumber": 10,
+                    "buyer": 5,
+                    "seller": 5,
+                    "agent": 5,
+                    "propertyAddress": 3,
+                },
+            )
+
+            await cls.db.contract_activity.create_index([("contract_id", 1), ("end", -1)])
+            await cls.db.contract_comments.create_index([("contract_id", 1), ("bucket", -1)], unique=True)
+            await cls.db.document_versions.create_index(
+                [("contract_id", 1), ("document_id", 1), ("version", 1)], unique=True
+            )
+            await cls.db.document_versions.create_index("hash")
+            await cls.db.upload_sessions.create_index("id", unique=True)
+            await cls.db.upload_sessions.create_index("expiresAt", expireAfterSeconds=0)
 
             await cls.db.tasks.create_index("code", unique=True)
             await cls.db.tasks.create_index("contract_id")
@@ -82,11 +145,18 @@ class MongoDB:
 
             await cls.db.documents.create_index("code", unique=True)
             await cls.db.documents.create_index("contract_id")
+            await cls.db.documents.create_index("metadata.hash")
+            await cls.db.document_analysis.create_index("hash", unique=True)
             await cls.db.documents.create_index("status")
             await cls.db.documents.create_index("type")
             await cls.db.documents.create_index("created_at")
             await cls.db.documents.create_index("updated_at")
 
+            await cls.db.users.create_index("id")
+            await cls.db.users.create_index("email")
+            await cls.db.users.create_index("token_version_changed_at")
+            await cls.db.user_tombstones.create_index("deleted_at")
+
             await cls.db.status_tracking.create_index("entity_id")
             await cls.db.status_tracking.create_index("entity_type")
             await cls.db.status_tracking.create_index("timestamp")
@@ -1,8 +1,158 @@
 #!/usr/bin/env python3
+"""
+Rebuild the contracts indexes and check that route queries use them.
+
+Usage:
+  python fix_indexes.py            # drop stale indexes, create indexes, list them
+  python fix_indexes.py --explain  # also explain each command the list routes send
+                                   # and report plans with COLLSCAN or in-memory SORT
+"""
+import argparse
 import asyncio
-from db.mongodb import MongoDB
+from datetime import datetime
+from db.mongodb import MongoDB, CONTRACT_SORT_FIELDS, REDUNDANT_CONTRACT_INDEXES
+from routes.contracts import (
+    CONTRACT_LIST_PROJECTION,
+    build_contract_list_query,
+    contract_access_filter,
+    contract_list_facet_pipeline,
+)
+from utils.pagination import keyset_filter, merge_filters
+
+# Stages that mean the query is not served by an index, in the query plan or
+# left as a pipeline stage after it
+PROBLEM_STAGES = {"COLLSCAN", "SORT", "$sort"}
+
+ADMIN = {"user_id": "explain-admin", "is_admin": True}
+USER = {"user_id": "explain-user", "is_admin": False}
+
+# Page size the list endpoint asks for by default, plus the look-ahead row
+LIST_FETCH = 21
+
+
+def find_command(query, sort):
+    command = {"find": "contracts", "filter": query, "projection": CONTRACT_LIST_PROJECTION, "limit": LIST_FETCH}
+    if sort:
+        command["sort"] = dict(sort)
+    return command
+
+
+def count_command(query):
+    """The aggregation count_documents() sends for includeTotal=exact."""
+    return {
+        "aggregate": "contracts",
+        "pipeline": [{"$match": query}, {"$group": {"_id": 1, "n": {"$sum": 1}}}],
+        "cursor": {}
+    }
+
+
+def facet_command(query, sort):
+    """The page-and-total aggregation the list route runs for exact substring searches."""
+    sort_spec = dict(sort)
+    projection = {**CONTRACT_LIST_PROJECTION, sort[0][0]: 1}
+    return {
+        "aggregate": "contracts",
+        "pipeline": contract_list_facet_pipeline(query, sort_spec, projection, LIST_FETCH),
+        "cursor": {}
+    }
+
+
+def query_shapes():
+    """Yield (name, command, scans) for the commands the contract routes send.
+
+    ``scans`` marks shapes that read every candidate by design: counting all
+    contracts and unanchored substring search.
+    """
+    for who, user in (("admin", ADMIN), ("user", USER)):
+        for sort_field in CONTRACT_SORT_FIELDS:
+            sort = [(sort_field, -1), ("id", -1)]
+            yield f"list {who} sort={sort_field}", find_command(build_contract_list_query(user), sort), False
 
-async def fix_indexes():
+        sort = [("updatedAt", -1), ("id", -1)]
+        for filter_name, query in (
+            ("all", build_contract_list_query(user)),
+            ("status", build_contract_list_query(user, status="In Review")),
+            ("type", build_contract_list_query(user, type="Property Sale")),
+        ):
+            if filter_name != "all":
+                yield f"list {who} {filter_name}", find_command(query, sort), False
+            yield f"count {who} {filter_name}", count_command(query), not query
+        yield (
+            f"list {who} cursor",
+            find_command(
+                merge_filters(
+                    build_contract_list_query(user),
+                    keyset_filter("updatedAt", datetime.utcnow(), "CNT-0", greater=False)
+                ),
+                sort
+            ),
+            False
+        )
+        text_query = build_contract_list_query(user, search="smith")
+        yield f"list {who} text search", find_command(text_query, sort), False
+        yield f"count {who} text search", count_command(text_query), False
+        substring_query = build_contract_list_query(user, search="smith", search_mode="substring")
+        yield f"list {who} substring search", facet_command(substring_query, sort), True
+
+        yield f"get {who}", find_command(merge_filters({"id": "CNT-0"}, contract_access_filter(user)), None), False
+
+    yield "delete user", find_command({"id": "CNT-0", "created_by": USER["user_id"]}, None), False
+
+
+def plan_stages(plan):
+    """Collect every stage name in an explain() plan tree (classic or SBE format)."""
+    stages = []
+    if not isinstance(plan, dict):
+        return stages
+    if "stage" in plan:
+        stages.append(plan["stage"])
+    for key in ("queryPlan", "inputStage"):
+        if key in plan:
+            stages.extend(plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(plan_stages(child))
+    return stages
+
+
+def explained_stages(explained):
+    """Stage names of a find or aggregate explain, query plan first.
+
+    An aggregation pushed down to the query layer entirely has a top-level
+    queryPlanner; otherwise the plan is under the first $cursor stage and the
+    stages MongoDB could not push down follow it.
+    """
+    if "queryPlanner" in explained:
+        return plan_stages(explained["queryPlanner"]["winningPlan"])
+    stages = []
+    for stage in explained.get("stages", []):
+        name = next(iter(stage))
+        if name == "$cursor":
+            stages.extend(plan_stages(stage[name]["queryPlanner"]["winningPlan"]))
+        else:
+            stages.append(name)
+    return stages
+
+
+async def explain_query_shapes(db) -> int:
+    """Explain each route command and return how many need attention."""
+    print("\nExplaining route query shapes:")
+    problems = 0
+    for name, command, scans in query_shapes():
+        explained = await db.command({"explain": command, "verbosity": "queryPlanner"})
+        stages = explained_stages(explained)
+        flagged = sorted(PROBLEM_STAGES.intersection(stages))
+        if flagged and scans:
+            status = "scan, expected"
+        elif flagged:
+            problems += 1
+            status = f"WARN {', '.join(flagged)}"
+        else:
+            status = "ok"
+        print(f"  [{status:<14}] {name:<32} {' <- '.join(stages)}")
+    return problems
+
+
+async def fix_indexes(explain: bool = False):
     # Connect to the database
     await MongoDB.connect_to_database()
     
@@ -16,6 +166,14 @@ async def fix_indexes():
     except Exception as e:
         print(f"Could not drop index (may not exist): {e}")
     
+    # Drop indexes now covered by the compound access indexes
+    for index_name in REDUNDANT_CONTRACT_INDEXES:
+        try:
+            await db.contracts.drop_index(index_name)
+            print(f"Dropped redundant '{index_name}' index")
+        except Exception:
+            pass
+    
     try:
         # Create the correct indexes
         print("\nCreating correct indexes...")
@@ -29,6 +187,13 @@ async def fix_indexes():
     indexes = await db.contracts.list_indexes().to_list(length=None)
     for index in indexes:
         print(f"  - {index}")
+    
+    if explain:
+        problems = await explain_query_shapes(db)
+        print(f"\n{problems} query shape(s) with COLLSCAN or in-memory SORT")
 
 if __name__ == "__main__":
-    asyncio.run(fix_indexes())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Rebuild contract indexes and explain route queries")
+    parser.add_argument("--explain", action="store_true", help="report COLLSCAN/SORT stages for each route query shape")
+    args = parser.parse_args()
+    asyncio.run(fix_indexes(explain=args.explain))
@@ -1,4 +1,5 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from typing import AsyncGenerator
 from fastapi import FastAPI, Depends, Request
 from fastapi.responses import JSONResponse
@@ -12,6 +13,10 @@ from routes.contracts import router as contracts_router
 from routes.auth import router as auth_router
 from routes.admin import router as admin_router
 from db.mongodb import MongoDB
+from services.contract_cache import CONTRACT_CACHE_CHANGE_STREAM, watch_contract_changes
+from services.document_processing import document_processor
+from services.document_versions import stop_chunking
+from utils.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # Load environment variables
@@ -22,9 +27,19 @@ load_dotenv()
 async def lifespan(app: FastAPI) -> AsyncGenerator:
     # Startup
     await MongoDB.connect_to_database()
+    contract_watcher = None
+    if CONTRACT_CACHE_CHANGE_STREAM:
+        contract_watcher = asyncio.create_task(watch_contract_changes())
+    await document_processor.start()
     print("Application startup complete")
     yield
     # Shutdown
+    await document_processor.stop()
+    stop_chunking()
+    if contract_watcher is not None:
+        contract_watcher.cancel()
+        with suppress(asyncio.CancelledError):
+            await contract_watcher
     await MongoDB.close_database_connection()
     print("Application shutdown complete")
 
@@ -33,7 +48,8 @@ app = FastAPI(
     title="ESCRa Backend",
     description="Backend API for ESCRa Contract Management System",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
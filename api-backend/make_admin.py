@@ -37,14 +37,17 @@ async def make_admin(email: str):
             print(f"ℹ️  User '{email}' is already an admin")
             return True
         
-        # Update user role to admin
+        # Update user role to admin and bump the token version so the
+        # user's existing tokens (which carry the old role) are rejected
         result = await users_collection.update_one(
             {"email": email},
             {
                 "$set": {
                     "role": "admin",
                     "updated_at": datetime.now()
-                }
+                },
+                "$currentDate": {"token_version_changed_at": True},
+                "$inc": {"token_version": 1}
             }
         )
         
@@ -52,6 +55,7 @@ async def make_admin(email: str):
             print(f"✅ Successfully promoted '{email}' to admin role")
             print(f"   User ID: {user['id']}")
             print(f"   Name: {user['firstName']} {user['lastName']}")
+            print("   The user must sign in again to pick up the new role")
             return True
         else:
             print(f"❌ Failed to update user role")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Move embedded contract activity logs and comments into bucketed collections.
+
+Contracts now embed only the newest ACTIVITY_EMBEDDED_ENTRIES activity entries
+and COMMENTS_EMBEDDED_ENTRIES comments; the full history is read from
+contract_activity and contract_comments. Run this before deploying that
+change: the capped $push trims older embedded entries on the next update, so
+anything not migrated by then is lost.
+
+The migration is idempotent. Activity entries already present in a bucket are
+skipped, comment buckets are rewritten whole, and migrated contracts are
+marked with activityMigrated / commentsMigrated.
+
+Usage:
+  python migrate_contract_history.py            # migrate every contract
+  python migrate_contract_history.py --dry-run  # only report what would move
+"""
+import argparse
+import asyncio
+from bson import ObjectId
+from db.mongodb import MongoDB
+from services.activity_log import ACTIVITY_EMBEDDED_ENTRIES, append_activities
+from services.comments import COMMENTS_EMBEDDED_ENTRIES, bucket_for
+
+
+async def bucketed_entry_ids(db, contract_id):
+    """Return the ids of the activity entries already stored in buckets."""
+    ids = set()
+    async for bucket in db.contract_activity.find({"contract_id": contract_id}, {"entries.id": 1}):
+        ids.update(entry.get("id") for entry in bucket.get("entries", []))
+    return ids
+
+
+async def migrate_activity(db, dry_run: bool = False):
+    migrated = 0
+    moved = 0
+    cursor = db.contracts.find(
+        {"activityMigrated": {"$ne": True}},
+        {"_id": 1, "id": 1, "activityLog": 1}
+    )
+    async for contract in cursor:
+        contract_id = contract["id"]
+        entries = contract.get("activityLog") or []
+
+        # Older entries may predate generated ids
+        for entry in entries:
+            if not entry.get("id"):
+                entry["id"] = str(ObjectId())
+
+        existing = await bucketed_entry_ids(db, contract_id)
+        pending = sorted(
+            (entry for entry in entries if entry["id"] not in existing),
+            key=lambda entry: entry["timestamp"]
+        )
+
+        if not dry_run:
+            await append_activities((contract_id, entry) for entry in pending)
+            await db.contracts.update_one(
+                {"_id": contract["_id"]},
+                {"$set": {
+                    "activityLog": entries[-ACTIVITY_EMBEDDED_ENTRIES:],
+                    "activityMigrated": True
+                }}
+            )
+
+        migrated += 1
+        moved += len(pending)
+        print(f"  {contract_id}: {len(pending)} of {len(entries)} entries moved")
+
+    action = "Would migrate" if dry_run else "Migrated"
+    print(f"\n{action} {migrated} contract(s), {moved} activity entries")
+
+
+async def migrate_comments(db, dry_run: bool = False):
+    migrated = 0
+    moved = 0
+    cursor = db.contracts.find(
+        # Contracts with a commentCount already store comments in buckets
+        {"commentsMigrated": {"$ne": True}, "commentCount": {"$exists": False}},
+        {"_id": 1, "id": 1, "comments": 1}
+    )
+    async for contract in cursor:
+        contract_id = contract["id"]
+        comments = sorted(contract.get("comments") or [], key=lambda comment: comment["timestamp"])
+
+        # Number comments oldest first, matching the commentCount sequence
+        buckets = {}
+        for seq, comment in enumerate(comments, start=1):
+            if not comment.get("id"):
+                comment["id"] = str(ObjectId())
+            buckets.setdefault(bucket_for(seq), []).append({**comment, "seq": seq})
+
+        if not dry_run:
+            for bucket, entries in buckets.items():
+                await db.contract_comments.replace_one(
+                    {"contract_id": contract_id, "bucket": bucket},
+                    {"contract_id": contract_id, "bucket": bucket, "entries": entries, "count": len(entries)},
+                    upsert=True
+                )
+            await db.contracts.update_one(
+                {"_id": contract["_id"]},
+                {"$set": {
+                    "comments": comments[-COMMENTS_EMBEDDED_ENTRIES:],
+                    "commentCount": len(comments),
+                    "commentsMigrated": True
+                }}
+            )
+
+        migrated += 1
+        moved += len(comments)
+        print(f"  {contract_id}: {len(comments)} comments in {len(buckets)} bucket(s)")
+
+    action = "Would migrate" if dry_run else "Migrated"
+    print(f"\n{action} {migrated} contract(s), {moved} comments")
+
+
+async def migrate_contract_history(dry_run: bool = False):
+    # Connect to the database
+    await MongoDB.connect_to_database()
+
+    db = MongoDB.get_database()
+    await MongoDB.create_indexes()
+
+    print("Migrating activity logs...")
+    await migrate_activity(db, dry_run=dry_run)
+    print("\nMigrating comments...")
+    await migrate_comments(db, dry_run=dry_run)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move embedded activity logs and comments into buckets")
+    parser.add_argument("--dry-run", action="store_true", help="report what would move without writing")
+    args = parser.parse_args()
+    asyncio.run(migrate_contract_history(dry_run=args.dry_run))
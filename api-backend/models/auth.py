@@ -2,6 +2,7 @@ from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 from datetime import datetime
 from enum import Enum
+from utils.ids import new_id
 
 class UserRole(str, Enum):
     ADMIN = "admin"
@@ -23,7 +24,7 @@ class UserLogin(BaseModel):
     password: str
 
 class UserInDB(UserBase):
-    id: str = Field(default_factory=lambda: str(datetime.now().timestamp()).replace('.', ''))
+    id: str = Field(default_factory=new_id)
     hashed_password: str
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
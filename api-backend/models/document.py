@@ -59,15 +59,33 @@ class Document(MongoBaseModel):
             }
         }
 
-    def add_version(self, new_url: str, uploaded_by: str, changes: Dict[str, Any]) -> None:
-        """Add a new version to the document's version history."""
-        self.version_history.append({
+    def add_version(
+        self,
+        new_url: str,
+        uploaded_by: str,
+        changes: Dict[str, Any],
+        digest: Optional[str] = None,
+        size: Optional[int] = None,
+        chunks: Optional[List[List[Any]]] = None
+    ) -> None:
+        """Add a new version to the document's version history.
+
+        ``chunks`` is the ``[[digest, size], ...]`` list from
+        ``services.document_versions.chunk_file``; when given, older versions
+        are read back from the shared chunk store instead of a full copy.
+        """
+        entry = {
             "version": self.metadata.version + 1,
             "url": new_url,
             "uploaded_by": uploaded_by,
             "uploaded_at": datetime.utcnow(),
             "changes": changes
-        })
+        }
+        if digest is not None:
+            entry.update({"hash": digest, "size": size, "chunks": chunks})
+            self.metadata.hash = digest
+            self.metadata.size = size
+        self.version_history.append(entry)
         self.metadata.version += 1
         self.url = new_url
 
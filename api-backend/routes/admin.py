@@ -2,8 +2,19 @@ from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr
 from db.mongodb import MongoDB
-from utils.auth import require_admin, get_password_hash
+from utils.auth import (
+    require_admin,
+    get_password_hash_async,
+    invalidate_user_cache,
+    user_cache,
+    token_cache,
+    token_versions,
+    with_token_version_bump,
+)
+from services.contract_cache import contract_cache
+from pymongo import ReturnDocument
 from models.auth import UserRole, UserResponse
+from utils.ids import new_id
 from datetime import datetime
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
@@ -121,18 +132,28 @@ async def update_user(
         raise HTTPException(status_code=400, detail="No fields to update")
     
     update_data["updated_at"] = datetime.now()
+    update_ops = {"$set": update_data}
+    
+    # Role changes and deactivation revoke the user's outstanding tokens; saving
+    # the same values again must not log the user out
+    role_changed = "role" in update_data and update_data["role"] != existing.get("role", "viewer")
+    active_changed = "is_active" in update_data and update_data["is_active"] != existing.get("is_active", True)
+    if role_changed or active_changed:
+        with_token_version_bump(update_ops)
     
     # Update user
     result = await users_collection.update_one(
         {"id": user_id},
-        {"$set": update_data}
+        update_ops
     )
+    invalidate_user_cache(user_id)
     
     if result.modified_count == 0:
         raise HTTPException(status_code=500, detail="Failed to update user")
     
     # Get updated user
     updated_user = await users_collection.find_one({"id": user_id})
+    token_versions.record(user_id, updated_user.get("token_version", 0))
     
     return UserResponse(
         id=updated_user["id"],
@@ -159,14 +180,17 @@ async def create_user_as_admin(
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     
+    # Hash off the event loop before building the document
+    hashed_password = await get_password_hash_async(user_data.password)
+    
     # Create new user
     new_user = {
-        "id": str(datetime.now().timestamp()).replace('.', ''),
+        "id": new_id(),
         "email": user_data.email,
         "firstName": user_data.firstName,
         "lastName": user_data.lastName,
         "role": user_data.role,
-        "hashed_password": get_password_hash(user_data.password),
+        "hashed_password": hashed_password,
         "created_at": datetime.now(),
         "updated_at": datetime.now(),
         "is_active": True
@@ -199,10 +223,20 @@ async def delete_user(user_id: str, current_admin: dict = Depends(require_admin)
         raise HTTPException(status_code=400, detail="Cannot delete your own account")
     
     result = await users_collection.delete_one({"id": user_id})
+    invalidate_user_cache(user_id)
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
     
+    # Tombstone lets every worker reject the deleted user's tokens
+    # Stamped by the server, which is the clock every worker's token version sync compares against
+    await db.user_tombstones.update_one(
+        {"id": user_id},
+        {"$currentDate": {"deleted_at": True}},
+        upsert=True
+    )
+    token_versions.revoke(user_id)
+    
     return {"success": True, "message": "User deleted successfully"}
 
 @router.post("/make-admin/{user_id}")
@@ -211,12 +245,26 @@ async def make_user_admin(user_id: str, current_admin: dict = Depends(require_ad
     db = MongoDB.get_database()
     users_collection = db.users
     
-    result = await users_collection.update_one(
-        {"id": user_id},
-        {"$set": {"role": "admin", "updated_at": datetime.now()}}
+    promoted = await users_collection.find_one_and_update(
+        {"id": user_id, "role": {"$ne": "admin"}},
+        with_token_version_bump({"$set": {"role": "admin", "updated_at": datetime.now()}}),
+        projection={"_id": 0, "token_version": 1},
+        return_document=ReturnDocument.AFTER
     )
+    invalidate_user_cache(user_id)
     
-    if result.modified_count == 0:
+    if promoted is None:
         raise HTTPException(status_code=404, detail="User not found or already admin")
     
-    return {"success": True, "message": "User promoted to admin"}
\ No newline at end of file
+    token_versions.record(user_id, promoted["token_version"])
+    
+    return {"success": True, "message": "User promoted to admin"}
+
+@router.get("/cache-stats")
+async def get_cache_stats(current_admin: dict = Depends(require_admin)):
+    """Get hit/miss counters for the in-process caches of this worker - admin only"""
+    return {
+        "users": user_cache.stats(),
+        "tokens": token_cache.stats(),
+        "contracts": contract_cache.stats()
+    }
\ No newline at end of file
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from models.auth import UserCreate, UserLogin, UserResponse, TokenResponse, UserInDB
-from utils.auth import get_password_hash, verify_password, create_access_token, get_current_user
+from utils.auth import get_password_hash_async, verify_password_async, create_access_token, get_current_user, invalidate_user_cache, token_claims_for
 from db.mongodb import MongoDB
 from datetime import datetime, timedelta
 import logging
@@ -31,7 +31,7 @@ async def register(user_data: UserCreate):
         
         # Create new user
         user_dict = user_data.dict()
-        hashed_password = get_password_hash(user_dict.pop("password"))
+        hashed_password = await get_password_hash_async(user_dict.pop("password"))
         
         user_in_db = UserInDB(
             **user_dict,
@@ -53,9 +53,7 @@ async def register(user_data: UserCreate):
         logger.info(f"Successfully registered user: {user_data.email} with ID: {user_in_db.id}")
         
         # Create access token
-        access_token = create_access_token(
-            data={"sub": user_in_db.id, "email": user_in_db.email}
-        )
+        access_token = create_access_token(data=token_claims_for(user_doc))
         
         # Create response
         user_response = UserResponse(
@@ -100,7 +98,7 @@ async def login(credentials: UserLogin):
             )
         
         # Verify password
-        if not verify_password(credentials.password, user["hashed_password"]):
+        if not await verify_password_async(credentials.password, user["hashed_password"]):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
@@ -114,9 +112,7 @@ async def login(credentials: UserLogin):
             )
         
         # Create access token
-        access_token = create_access_token(
-            data={"sub": user["id"], "email": user["email"]}
-        )
+        access_token = create_access_token(data=token_claims_for(user))
         
         # Create response
         user_response = UserResponse(
@@ -218,6 +214,7 @@ async def update_profile(
             {"id": current_user["user_id"]},
             {"$set": update_data}
         )
+        invalidate_user_cache(current_user["user_id"])
         
         if result.modified_count == 0:
             raise HTTPException(
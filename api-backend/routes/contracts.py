@@ -1,14 +1,98 @@
-from fastapi import APIRouter, HTTPException, Query, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Query, Depends, UploadFile, File, Request, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, EmailStr, validator
-from datetime import datetime, date, timedelta
-from db.mongodb import MongoDB
+from pydantic import BaseModel, Field, EmailStr, ValidationError, validator
+from datetime import datetime, date, timedelta, timezone
+from db.mongodb import MongoDB, CONTRACT_SORT_FIELDS
 from utils.auth import get_current_user, get_current_user_with_role
+from utils.cache import TTLCache
+from services.activity_log import (
+    ACTIVITY_EMBEDDED_ENTRIES,
+    append_activities,
+    append_activity,
+    delete_activity,
+    get_activity_page,
+    start_activities,
+)
+from services.blob_store import blob_store
+from services.comments import COMMENTS_EMBEDDED_ENTRIES, append_comment, delete_comments, get_comment_page
+from services.document_processing import document_processor, is_processable
+from services import document_versions
+from services import uploads
+from services.contract_cache import can_access_contract, get_cached_contract, invalidate_contract
+from utils.responses import ORJSONResponse
+from utils.http_cache import (
+    cache_validator_headers,
+    content_etag,
+    entity_etag,
+    etag_matches,
+    if_match_version,
+    is_not_modified,
+    not_modified_response,
+)
+from utils.export import csv_chunks, ndjson_chunks
+from utils.file_response import (
+    RangeFileResponse,
+    RangeNotSatisfiable,
+    content_disposition,
+    parse_range,
+    range_applies,
+)
+from utils.ids import new_contract_id
+from utils.ingest import iter_csv_rows, iter_ndjson_rows
+from utils.pagination import decode_cursor, encode_cursor, keyset_filter, merge_filters
+import asyncio
 import json
+import os
+import re
 from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
 
 router = APIRouter(prefix="/api/contracts", tags=["contracts"])
 
+# Fields the list view needs; the document count is computed server-side so the
+# embedded arrays (activityLog, comments, documentsList) never leave MongoDB
+CONTRACT_LIST_PROJECTION = {
+    "id": 1,
+    "title": 1,
+    "buyer": 1,
+    "seller": 1,
+    "agent": 1,
+    "status": 1,
+    "updatedAt": 1,
+    "value": 1,
+    "type": 1,
+    "milestone": 1,
+    "closingDate": 1,
+    "dueDate": 1,
+    "documentCount": {"$size": {"$ifNull": ["$documentsList", []]}}
+}
+
+# Allowed status transitions; updating to the current status is also allowed
+VALID_STATUS_TRANSITIONS = {
+    "Initiation": ["Preparation"],
+    "Preparation": ["Wire Details"],
+    "Wire Details": ["In Review"],
+    "In Review": ["Signatures"],
+    "Signatures": ["Funds Disbursed"],
+    "Funds Disbursed": ["Complete"]
+}
+
+# Most contracts one bulk status request may move
+BULK_STATUS_MAX_CONTRACTS = int(os.getenv("BULK_STATUS_MAX_CONTRACTS", "500"))
+
+# Export: documents per cursor batch from MongoDB
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Bulk import: rows per insert_many and how many row errors a response lists
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+IMPORT_MAX_REPORTED_ERRORS = int(os.getenv("IMPORT_MAX_REPORTED_ERRORS", "1000"))
+
+# Totals served to includeTotal=estimated callers, keyed by query shape
+LIST_TOTAL_CACHE_TTL_SECONDS = float(os.getenv("LIST_TOTAL_CACHE_TTL_SECONDS", "60"))
+list_total_cache = TTLCache(maxsize=1024, ttl=LIST_TOTAL_CACHE_TTL_SECONDS)
+
 # Helper function to format relative time
 def format_relative_time(dt: datetime) -> str:
     now = datetime.utcnow()
@@ -35,6 +119,115 @@ def format_currency(value: Optional[float]) -> str:
         return "$0"
     return f"${value:,.0f}"
 
+# Helper function to restrict queries to contracts the user may access
+def contract_access_filter(current_user: dict) -> Dict[str, Any]:
+    if current_user.get("is_admin"):
+        return {}
+    return {
+        "$or": [
+            {"created_by": current_user["user_id"]},
+            {"shared_with": current_user["user_id"]}
+        ]
+    }
+
+# Helper function to read the contract version a write is conditional on
+def expected_version(request: Request) -> Optional[int]:
+    try:
+        return if_match_version(request.headers)
+    except ValueError:
+        raise HTTPException(status_code=412, detail="Contract has been modified")
+
+# Helper function to pin a write to a contract version (None = unconditional)
+def version_filter(version: Optional[int]) -> Dict[str, Any]:
+    if version is None:
+        return {}
+    if version == 0:
+        # Contracts written before versioning have no version field
+        return {"version": {"$in": [0, None]}}
+    return {"version": version}
+
+# Helper function to explain a conditional write that matched nothing; returns
+# the contract's version and status when neither 404 nor 412 applies
+async def raise_write_failure(contracts_collection, query: Dict[str, Any], version: Optional[int]) -> Dict[str, Any]:
+    existing = await contracts_collection.find_one(query, {"version": 1, "status": 1})
+    if not existing:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    if version is not None and existing.get("version", 0) != version:
+        raise HTTPException(status_code=412, detail="Contract has been modified")
+    return existing
+
+# Helper function to build the contracts list query shared by list-style endpoints
+def build_contract_list_query(
+    current_user: dict,
+    status: Optional[str] = None,
+    type: Optional[str] = None,
+    search: Optional[str] = None,
+    search_mode: str = "text"
+) -> Dict[str, Any]:
+    query = contract_access_filter(current_user)
+    
+    if search and search_mode == "text":
+        # Served by the contract_text_search index
+        query = merge_filters(query, {"$text": {"$search": search}})
+    elif search:
+        # Unanchored substring match; cannot use an index and scans every contract
+        pattern = re.escape(search)
+        search_filter = {
+            "$or": [
+                {"title": {"$regex": pattern, "$options": "i"}},
+                {"buyer": {"$regex": pattern, "$options": "i"}},
+                {"seller": {"$regex": pattern, "$options": "i"}},
+                {"agent": {"$regex": pattern, "$options": "i"}}
+            ]
+        }
+        query = merge_filters(query, search_filter)
+    
+    if status:
+        query["status"] = status
+    if type:
+        query["type"] = type
+    
+    return query
+
+# Helper function to build an atomic append, trimmed to the newest entries when capped
+def push_entry(entry: Dict[str, Any], cap: Optional[int] = None) -> Dict[str, Any]:
+    push = {"$each": [entry]}
+    if cap:
+        push["$slice"] = -cap
+    return push
+
+# Helper function to build the page-and-total aggregation used for substring searches
+def contract_list_facet_pipeline(
+    query: Dict[str, Any],
+    sort_spec: Dict[str, Any],
+    projection: Dict[str, Any],
+    limit: int,
+    keyset: Optional[Dict[str, Any]] = None,
+    skip: int = 0
+) -> List[Dict[str, Any]]:
+    page_stages = [{"$match": keyset}] if keyset else ([{"$skip": skip}] if skip else [])
+    return [
+        {"$match": query},
+        {"$sort": sort_spec},
+        {"$facet": {
+            "items": page_stages + [{"$limit": limit}, {"$project": projection}],
+            "total": [{"$count": "count"}]
+        }}
+    ]
+
+# Helper function to return a cached or approximate total for includeTotal=estimated
+async def estimate_contract_total(contracts_collection, query: Dict[str, Any]) -> int:
+    if not query:
+        # Collection metadata, no scan
+        return await contracts_collection.estimated_document_count()
+    
+    cache_key = json.dumps(query, sort_keys=True, default=str)
+    total = list_total_cache.get(cache_key)
+    if total is None:
+        total = await contracts_collection.count_documents(query)
+        list_total_cache.set(cache_key, total)
+    return total
+
 # Pydantic Models
 class ContractParty(BaseModel):
     id: str = Field(default_factory=lambda: str(ObjectId()))
@@ -60,8 +253,15 @@ class ContractDocument(BaseModel):
     type: str
     status: str = "pending"
     size: int = 0
+    hash: Optional[str] = None  # SHA-256 of the stored bytes
+    version: int = 1
     url: Optional[str] = None
     uploadedAt: datetime = Field(default_factory=datetime.utcnow)
+    
+    # Filled in by background processing
+    pages: Optional[int] = None
+    dimensions: Optional[Dict[str, int]] = None
+    thumbnailHash: Optional[str] = None
 
 class ContractSignature(BaseModel):
     id: str = Field(default_factory=lambda: str(ObjectId()))
@@ -155,7 +355,7 @@ class ContractBase(BaseModel):
         return v
 
 class Contract(ContractBase):
-    id: str = Field(default_factory=lambda: f"CNT-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}")
+    id: str = Field(default_factory=new_contract_id)
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
     
@@ -163,11 +363,15 @@ class Contract(ContractBase):
     created_by: Optional[str] = None  # User ID who created the contract
     shared_with: List[str] = []  # List of user IDs who can access this contract
     
+    # Incremented by every write; clients send it back in If-Match
+    version: int = 1
+    
     # Related Data
     tasks: List[ContractTask] = []
     documentsList: List[ContractDocument] = []
     signatures: List[ContractSignature] = []
-    comments: List[ContractComment] = []
+    comments: List[ContractComment] = []  # Newest COMMENTS_EMBEDDED_ENTRIES only
+    commentCount: int = 0
     activityLog: List[ActivityLogEntry] = []
     
     # Computed fields for response
@@ -177,7 +381,7 @@ class Contract(ContractBase):
 
 class ContractListResponse(BaseModel):
     contracts: List[Dict[str, Any]]
-    pagination: Dict[str, int]
+    pagination: Dict[str, Any]
 
 class ContractCreateRequest(ContractBase):
     pass
@@ -208,76 +412,118 @@ class StatusUpdateRequest(BaseModel):
     status: str
     reason: Optional[str] = None
 
+class BulkStatusUpdateRequest(BaseModel):
+    contractIds: List[str] = Field(..., min_length=1, max_length=BULK_STATUS_MAX_CONTRACTS)
+    status: str
+
+class UploadSessionRequest(BaseModel):
+    name: str
+    type: str = "application/octet-stream"
+    size: int = Field(..., gt=0)
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-f]{64}$")
+
+class UploadCompleteRequest(BaseModel):
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-f]{64}$")
+
+# Scalar contract fields an export can select; embedded arrays are left out
+EXPORT_FIELDS = ["id", *ContractBase.model_fields, "created_by", "createdAt", "updatedAt", "version", "commentCount"]
+
 # Routes
 
 @router.get("", response_model=ContractListResponse)
 async def get_contracts(
+    request: Request,
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     status: Optional[str] = None,
     type: Optional[str] = None,
     search: Optional[str] = None,
+    searchMode: str = Query("text", pattern="^(text|substring)$"),
     sortBy: str = "updatedAt",
     sortOrder: str = "desc",
+    includeTotal: str = Query("exact", pattern="^(exact|estimated|false)$"),
     current_user: dict = Depends(get_current_user_with_role)
 ):
-    """Get list of contracts with pagination and filtering - admins see all, others see only their contracts"""
+    """Get list of contracts with pagination and filtering - admins see all, others see only their contracts
+
+    Pass the ``next``/``prev`` cursor from a previous response as ``cursor`` to page by key
+    instead of by offset; ``page`` is ignored when a cursor is given.
+    ``includeTotal=estimated`` returns a cached or approximate total and ``includeTotal=false``
+    skips counting (``total`` and ``pages`` are null), which suits infinite-scroll clients.
+    ``search`` uses the full-text index by default (whole words, stemmed); ``searchMode=substring``
+    falls back to case-insensitive substring matching. ``sortBy=relevance`` ranks text matches by
+    score and pages by offset only.
+    """
     db = MongoDB.get_database()
     contracts_collection = db.contracts
     
-    # Build query - admins see all, others see filtered
-    if current_user["is_admin"]:
-        query = {}
-    else:
-        query = {
-            "$or": [
-                {"created_by": current_user["user_id"]},
-                {"shared_with": current_user["user_id"]}
-            ]
-        }
-    
-    # Add additional filters
-    if status:
-        query["status"] = status
-    if type:
-        query["type"] = type
-    if search:
-        search_filter = {
-            "$or": [
-                {"title": {"$regex": search, "$options": "i"}},
-                {"buyer": {"$regex": search, "$options": "i"}},
-                {"seller": {"$regex": search, "$options": "i"}},
-                {"agent": {"$regex": search, "$options": "i"}}
-            ]
-        }
-        
-        if current_user["is_admin"]:
-            query.update(search_filter)
-        else:
-            # Combine user filter with search filter
-            user_filter = query.get("$or", [])
-            query = {
-                "$and": [
-                    {"$or": user_filter},
-                    search_filter
-                ]
-            }
-        
-        if status and not current_user["is_admin"]:
-            query["status"] = status
-        if type and not current_user["is_admin"]:
-            query["type"] = type
+    query = build_contract_list_query(
+        current_user, status=status, type=type, search=search, search_mode=searchMode
+    )
     
-    # Get total count
-    total = await contracts_collection.count_documents(query)
+    by_relevance = sortBy == "relevance"
+    if sortBy not in CONTRACT_SORT_FIELDS and not by_relevance:
+        raise HTTPException(
+            status_code=400,
+            detail=f"sortBy must be one of {list(CONTRACT_SORT_FIELDS) + ['relevance']}"
+        )
+    if by_relevance and not (search and searchMode == "text"):
+        raise HTTPException(status_code=400, detail="sortBy=relevance requires a text search")
+    if by_relevance and cursor:
+        raise HTTPException(status_code=400, detail="Cursors are not supported with sortBy=relevance")
     
-    # Calculate pagination
-    skip = (page - 1) * limit
     sort_direction = -1 if sortOrder == "desc" else 1
     
-    # Fetch contracts
-    cursor = contracts_collection.find(query).sort(sortBy, sort_direction).skip(skip).limit(limit)
-    contracts = await cursor.to_list(length=limit)
+    # Keyset mode: continue from the cursor position, walking backwards for prev cursors
+    before = False
+    keyset = None
+    skip = 0
+    if cursor:
+        try:
+            position = decode_cursor(cursor, sortBy, sortOrder)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        before = position["before"]
+        keyset = keyset_filter(sortBy, position["value"], position["id"], greater=(sort_direction == 1) != before)
+    else:
+        skip = (page - 1) * limit
+    
+    fetch_direction = -sort_direction if before else sort_direction
+    
+    if by_relevance:
+        sort_spec = {"score": {"$meta": "textScore"}, "id": 1}
+        projection = CONTRACT_LIST_PROJECTION
+    else:
+        sort_spec = {sortBy: fetch_direction, "id": fetch_direction}
+        # The sort key is projected too so cursors can be built from the rows
+        projection = {**CONTRACT_LIST_PROJECTION, sortBy: 1}
+    
+    # Fetch one extra row to learn whether another page exists
+    if includeTotal == "exact" and search and searchMode == "substring":
+        # A regex filter scans every match whatever we do, so count in the same pass
+        pipeline = contract_list_facet_pipeline(query, sort_spec, projection, limit + 1, keyset=keyset, skip=skip)
+        facets = await contracts_collection.aggregate(pipeline).to_list(length=1)
+        contracts = facets[0]["items"]
+        total = facets[0]["total"][0]["count"] if facets[0]["total"] else 0
+    else:
+        cursor_query = contracts_collection.find(merge_filters(query, keyset), projection).sort(
+            list(sort_spec.items())
+        ).skip(skip).limit(limit + 1)
+        if includeTotal == "exact":
+            # The page reads only its own rows from the index; the count runs alongside it
+            contracts, total = await asyncio.gather(
+                cursor_query.to_list(length=limit + 1),
+                contracts_collection.count_documents(query)
+            )
+        else:
+            contracts = await cursor_query.to_list(length=limit + 1)
+            total = await estimate_contract_total(contracts_collection, query) if includeTotal == "estimated" else None
+    
+    has_more = len(contracts) > limit
+    contracts = contracts[:limit]
+    if before:
+        contracts.reverse()
     
     # Format contracts for response
     formatted_contracts = []
@@ -300,7 +546,7 @@ async def get_contracts(
         value_str = format_currency(contract.get("value"))
         
         # Count documents
-        doc_count = len(contract.get("documentsList", []))
+        doc_count = contract.get("documentCount", 0)
         
         formatted_contract = {
             "id": contract.get("id", str(contract.get("_id", ""))),
@@ -318,36 +564,124 @@ async def get_contracts(
         }
         formatted_contracts.append(formatted_contract)
     
-    return ContractListResponse(
-        contracts=formatted_contracts,
-        pagination={
-            "total": total,
-            "page": page,
-            "limit": limit,
-            "pages": (total + limit - 1) // limit
-        }
-    )
+    # Cursors around the returned page
+    if cursor:
+        has_next = has_more if not before else True
+        has_prev = has_more if before else True
+    else:
+        has_next = has_more
+        has_prev = page > 1
+    
+    next_cursor = None
+    prev_cursor = None
+    if by_relevance:
+        has_next = has_prev = False
+    if contracts and has_next:
+        last = contracts[-1]
+        next_cursor = encode_cursor(sortBy, sortOrder, last.get(sortBy), last.get("id"))
+    if contracts and has_prev:
+        first = contracts[0]
+        prev_cursor = encode_cursor(sortBy, sortOrder, first.get(sortBy), first.get("id"), before=True)
+    
+    pagination = {
+        "total": total,
+        "limit": limit,
+        "pages": (total + limit - 1) // limit if total is not None else None,
+        "next": next_cursor,
+        "prev": prev_cursor
+    }
+    if not cursor:
+        pagination["page"] = page
+    
+    # Built from trusted data above; returned directly to skip response_model re-validation
+    response = ORJSONResponse({
+        "contracts": formatted_contracts,
+        "pagination": pagination
+    })
+    
+    # Polling clients get a 304 without the body when the page is unchanged
+    etag = content_etag(response.body)
+    if is_not_modified(request.headers, etag):
+        return not_modified_response(etag)
+    response.headers.update(cache_validator_headers(etag))
+    return response
 
-@router.get("/{contract_id}")
-async def get_contract(contract_id: str, current_user: dict = Depends(get_current_user_with_role)):
-    """Get contract details by ID - admins can see all, others need access"""
+@router.get("/export")
+async def export_contracts(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    fields: Optional[str] = None,
+    status: Optional[str] = None,
+    type: Optional[str] = None,
+    search: Optional[str] = None,
+    searchMode: str = Query("text", pattern="^(text|substring)$"),
+    updatedAfter: Optional[datetime] = None,
+    updatedBefore: Optional[datetime] = None,
+    current_user: dict = Depends(get_current_user_with_role)
+):
+    """Stream every matching contract as NDJSON or CSV - admins export all, others their own and shared
+
+    ``fields`` is a comma-separated subset of EXPORT_FIELDS (default: all of them).
+    Rows are read from one cursor and written as they arrive, newest update first.
+    """
     db = MongoDB.get_database()
     contracts_collection = db.contracts
     
-    # Find contract - admins can see all, others need access
-    if current_user["is_admin"]:
-        contract = await contracts_collection.find_one({"id": contract_id})
+    selected = EXPORT_FIELDS
+    if fields:
+        selected = list(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+        unknown = [field for field in selected if field not in EXPORT_FIELDS]
+        if unknown or not selected:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown export fields: {', '.join(unknown)}. Allowed: {', '.join(EXPORT_FIELDS)}"
+            )
+    
+    query = build_contract_list_query(current_user, status, type, search, searchMode)
+    updated_range = {}
+    if updatedAfter:
+        updated_range["$gte"] = updatedAfter
+    if updatedBefore:
+        updated_range["$lt"] = updatedBefore
+    if updated_range:
+        query = merge_filters(query, {"updatedAt": updated_range})
+    
+    projection = {"_id": 0, **{field: 1 for field in selected}}
+    cursor = (
+        contracts_collection.find(query, projection)
+        .sort([("updatedAt", -1), ("id", -1)])
+        .batch_size(EXPORT_BATCH_SIZE)
+    )
+    
+    if format == "csv":
+        body, media_type = csv_chunks(cursor, selected), "text/csv"
     else:
-        contract = await contracts_collection.find_one({
-            "id": contract_id,
-            "$or": [
-                {"created_by": current_user["user_id"]},
-                {"shared_with": current_user["user_id"]}
-            ]
-        })
-    if not contract:
+        body, media_type = ndjson_chunks(cursor, selected), "application/x-ndjson"
+    filename = f"contracts-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": content_disposition("attachment", filename)}
+    )
+
+@router.get("/{contract_id}")
+async def get_contract(contract_id: str, request: Request, current_user: dict = Depends(get_current_user_with_role)):
+    """Get contract details by ID - admins can see all, others need access
+
+    Served from the contract cache when possible. Responses carry an ETag and Last-Modified;
+    a matching If-None-Match or If-Modified-Since gets a 304 without serialising the contract.
+    """
+    # Find contract - admins can see all, others need access
+    cached = await get_cached_contract(contract_id)
+    if not cached or not can_access_contract(cached, current_user):
         raise HTTPException(status_code=404, detail="Contract not found")
     
+    etag = entity_etag(cached.get("version", 0), cached.get("updatedAt"))
+    if is_not_modified(request.headers, etag, cached.get("updatedAt")):
+        return not_modified_response(etag, cached.get("updatedAt"))
+    
+    # Shallow copy: only top-level keys are changed below
+    contract = dict(cached)
+    
     # Remove MongoDB _id field
     contract.pop("_id", None)
     
@@ -364,30 +698,44 @@ async def get_contract(contract_id: str, current_user: dict = Depends(get_curren
     # Format dates
     contract["updated"] = format_relative_time(contract.get("updatedAt", datetime.utcnow()))
     contract["documents"] = len(contract.get("documentsList", []))
+    contract.setdefault("commentCount", len(contract.get("comments", [])))
     
-    return contract
-
-@router.post("", response_model=Contract)
-async def create_contract(contract_data: ContractCreateRequest, current_user: dict = Depends(get_current_user)):
-    """Create a new contract"""
-    db = MongoDB.get_database()
-    contracts_collection = db.contracts
-    
-    # Create contract with generated ID and user association
-    contract = Contract(**contract_data.dict())
-    contract.created_by = current_user["user_id"]
-    
-    # Add initial activity log entry
-    contract.activityLog.append(
-        ActivityLogEntry(
-            action="Contract created",
-            user="System",
-            details=f"Contract '{contract.title}' was created"
-        )
+    return ORJSONResponse(
+        contract,
+        headers=cache_validator_headers(etag, contract.get("updatedAt"))
     )
-    
-    # Convert to dict and insert
-    contract_dict = contract.dict()
+
+# Helper function to build the stored document for a new contract
+def new_contract_document(contract_data: ContractCreateRequest, current_user: dict, verb: str = "created") -> Dict[str, Any]:
+    # Built directly from the validated request: running it through Contract and
+    # ActivityLogEntry again would re-validate every field (and every email) per row,
+    # which dominated the import path. Keep in step with the Contract model.
+    now = datetime.utcnow()
+    contract_dict = contract_data.dict()
+    contract_dict.update({
+        "id": new_contract_id(),
+        "createdAt": now,
+        "updatedAt": now,
+        "created_by": current_user["user_id"],
+        "shared_with": [],
+        "version": 1,
+        "tasks": [],
+        "documentsList": [],
+        "signatures": [],
+        "comments": [],
+        "commentCount": 0,
+        # Add initial activity log entry
+        "activityLog": [{
+            "id": str(ObjectId()),
+            "action": f"Contract {verb}",
+            "user": "System",
+            "timestamp": now,
+            "details": f"Contract '{contract_data.title}' was {verb}"
+        }],
+        "parties": None,
+        "updated": None,
+        "documents": None,
+    })
     
     # Convert date objects to strings for MongoDB
     if contract_dict.get("closingDate"):
@@ -395,34 +743,149 @@ async def create_contract(contract_data: ContractCreateRequest, current_user: di
     if contract_dict.get("dueDate"):
         contract_dict["dueDate"] = contract_dict["dueDate"].isoformat()
     
+    return contract_dict
+
+@router.post("/import")
+async def import_contracts(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    chunkSize: int = Query(IMPORT_CHUNK_SIZE, ge=1, le=10000),
+    current_user: dict = Depends(get_current_user)
+):
+    """Bulk-create contracts from a streamed NDJSON or CSV request body
+
+    Each row is validated like POST /api/contracts and valid rows are inserted in
+    chunks of ``chunkSize``. Invalid rows are skipped and reported by row number.
+    The format comes from ``format`` or the Content-Type (text/csv, otherwise NDJSON).
+    If the import stops part way, the error detail lists the contracts already
+    inserted (``inserted`` and ``insertedIds``) so the client can resume.
+    """
+    db = MongoDB.get_database()
+    contracts_collection = db.contracts
+    
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if content_type.startswith("text/csv") else "ndjson"
+    parse_rows = iter_csv_rows if format == "csv" else iter_ndjson_rows
+    
+    inserted = 0
+    inserted_ids: List[str] = []
+    failed = 0
+    errors: List[Dict[str, Any]] = []
+    
+    def record_error(row_number: int, messages: List[str]):
+        nonlocal failed
+        failed += 1
+        if len(errors) < IMPORT_MAX_REPORTED_ERRORS:
+            errors.append({"row": row_number, "errors": messages})
+    
+    async def insert_chunk(rows: List[int], documents: List[Dict[str, Any]]):
+        nonlocal inserted
+        rejected = {}
+        try:
+            await contracts_collection.insert_many(documents, ordered=False)
+        except BulkWriteError as exc:
+            rejected = {error["index"]: error["errmsg"] for error in exc.details.get("writeErrors", [])}
+        for index, message in sorted(rejected.items()):
+            record_error(rows[index], [message])
+        created = [doc for index, doc in enumerate(documents) if index not in rejected]
+        inserted += len(created)
+        inserted_ids.extend(doc["id"] for doc in created)
+        await start_activities((doc["id"], doc["activityLog"][0]) for doc in created)
+    
+    # Parsing the next chunk overlaps with inserting the previous one
+    pending = None
+    rows: List[int] = []
+    documents: List[Dict[str, Any]] = []
+    # Helper function to report a stopped import together with what it already inserted
+    def import_failed(status_code: int, exc: Exception) -> HTTPException:
+        return HTTPException(status_code=status_code, detail={
+            "message": str(exc),
+            "inserted": inserted,
+            "insertedIds": inserted_ids,
+            "failed": failed,
+            "errors": errors
+        })
+    
+    try:
+        try:
+            async for row_number, row, error in parse_rows(request.stream()):
+                if error:
+                    record_error(row_number, [error])
+                    continue
+                try:
+                    contract_data = ContractCreateRequest(**row)
+                except ValidationError as exc:
+                    record_error(row_number, [
+                        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+                        for detail in exc.errors()
+                    ])
+                    continue
+                
+                contract_dict = new_contract_document(contract_data, current_user, verb="imported")
+                rows.append(row_number)
+                documents.append(contract_dict)
+                
+                if len(documents) >= chunkSize:
+                    if pending:
+                        await pending
+                    pending = asyncio.create_task(insert_chunk(rows, documents))
+                    rows, documents = [], []
+        finally:
+            if pending:
+                await pending
+        
+        if documents:
+            await insert_chunk(rows, documents)
+    except ValueError as exc:
+        raise import_failed(400, exc)
+    except PyMongoError as exc:
+        raise import_failed(500, exc)
+    
+    return {
+        "success": failed == 0,
+        "inserted": inserted,
+        "failed": failed,
+        "errors": errors,
+        "errorsTruncated": failed > len(errors)
+    }
+
+@router.post("", response_model=Contract)
+async def create_contract(contract_data: ContractCreateRequest, current_user: dict = Depends(get_current_user)):
+    """Create a new contract"""
+    db = MongoDB.get_database()
+    contracts_collection = db.contracts
+    
+    contract_dict = new_contract_document(contract_data, current_user)
+    
     result = await contracts_collection.insert_one(contract_dict)
+    await append_activity(contract_dict["id"], contract_dict["activityLog"][0])
     
     # Format response
-    contract_dict["parties"] = f"{contract.buyer} & {contract.seller}"
+    contract_dict["parties"] = f"{contract_dict['buyer']} & {contract_dict['seller']}"
     contract_dict["updated"] = "just now"
     contract_dict["documents"] = 0
     
     return contract_dict
 
 @router.put("/{contract_id}")
-async def update_contract(contract_id: str, updates: ContractUpdateRequest, current_user: dict = Depends(get_current_user_with_role)):
-    """Update a contract - admins can update all, others need access"""
+async def update_contract(
+    contract_id: str,
+    updates: ContractUpdateRequest,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user_with_role)
+):
+    """Update a contract - admins can update all, others need access
+
+    With If-Match the update only applies to that contract version, otherwise 412.
+    """
     db = MongoDB.get_database()
     contracts_collection = db.contracts
     
-    # Get existing contract - admins can update all, others need access
-    if current_user["is_admin"]:
-        existing = await contracts_collection.find_one({"id": contract_id})
-    else:
-        existing = await contracts_collection.find_one({
-            "id": contract_id,
-            "$or": [
-                {"created_by": current_user["user_id"]},
-                {"shared_with": current_user["user_id"]}
-            ]
-        })
-    if not existing:
-        raise HTTPException(status_code=404, detail="Contract not found")
+    # Admins can update all, others need access
+    query = merge_filters({"id": contract_id}, contract_access_filter(current_user))
+    version = expected_version(request)
     
     # Prepare updates
     update_dict = {k: v for k, v in updates.dict().items() if v is not None}
@@ -434,50 +897,56 @@ async def update_contract(contract_id: str, updates: ContractUpdateRequest, curr
     if "dueDate" in update_dict and update_dict["dueDate"]:
         update_dict["dueDate"] = update_dict["dueDate"].isoformat()
     
-    # Add activity log entry
-    if "activityLog" not in existing:
-        existing["activityLog"] = []
-    
-    existing["activityLog"].append({
+    # Activity log entry is appended atomically with the update
+    activity = {
         "id": str(ObjectId()),
         "action": "Contract updated",
         "user": "System",
         "timestamp": datetime.utcnow(),
         "details": f"Updated fields: {', '.join(update_dict.keys())}"
-    })
-    
-    # Update contract
-    update_dict["activityLog"] = existing["activityLog"]
+    }
     
-    result = await contracts_collection.update_one(
-        {"id": contract_id},
-        {"$set": update_dict}
+    # Update contract and return the result in one round trip
+    updated = await contracts_collection.find_one_and_update(
+        merge_filters(query, version_filter(version)),
+        {
+            "$set": update_dict,
+            "$inc": {"version": 1},
+            "$push": {"activityLog": push_entry(activity, ACTIVITY_EMBEDDED_ENTRIES)}
+        },
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
     )
+    invalidate_contract(contract_id)
     
-    if result.modified_count == 0:
-        raise HTTPException(status_code=400, detail="Failed to update contract")
+    if updated is None:
+        await raise_write_failure(contracts_collection, query, version)
+    await append_activity(contract_id, activity)
     
-    # Return updated contract
-    updated = await contracts_collection.find_one({"id": contract_id})
-    updated.pop("_id", None)
+    response.headers["ETag"] = entity_etag(updated["version"], updated["updatedAt"])
     return updated
 
 @router.patch("/{contract_id}")
-async def update_contract_field(contract_id: str, update: ContractFieldUpdateRequest, current_user: dict = Depends(get_current_user)):
-    """Update a single field of a contract - only if user has access"""
+async def update_contract_field(
+    contract_id: str,
+    update: ContractFieldUpdateRequest,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user)
+):
+    """Update a single field of a contract - only if user has access
+
+    With If-Match the update only applies to that contract version, otherwise 412.
+    """
     db = MongoDB.get_database()
     contracts_collection = db.contracts
     
-    # Check if contract exists and user has access
-    existing = await contracts_collection.find_one({
-        "id": contract_id,
-        "$or": [
-            {"created_by": current_user["user_id"]},
-            {"shared_with": current_user["user_id"]}
-        ]
-    })
-    if not existing:
-        raise HTTPException(status_code=404, detail="Contract not found")
+    if update.field in ("id", "version"):
+        raise HTTPException(status_code=400, detail=f"Field '{update.field}' cannot be updated")
+    
+    # Only if contract exists and user has access
+    query = merge_filters({"id": contract_id}, contract_access_filter(current_user))
+    version = expected_version(request)
     
     # Update the field
     update_dict = {
@@ -485,14 +954,18 @@ async def update_contract_field(contract_id: str, update: ContractFieldUpdateReq
         "updatedAt": datetime.utcnow()
     }
     
-    result = await contracts_collection.update_one(
-        {"id": contract_id},
-        {"$set": update_dict}
+    updated = await contracts_collection.find_one_and_update(
+        merge_filters(query, version_filter(version)),
+        {"$set": update_dict, "$inc": {"version": 1}},
+        projection={"_id": 0, "version": 1, "updatedAt": 1},
+        return_document=ReturnDocument.AFTER
     )
+    invalidate_contract(contract_id)
     
-    if result.modified_count == 0:
-        raise HTTPException(status_code=400, detail="Failed to update contract field")
+    if updated is None:
+        await raise_write_failure(contracts_collection, query, version)
     
+    response.headers["ETag"] = entity_etag(updated["version"], updated["updatedAt"])
     return {
         "success": True,
         "message": "Contract updated successfully",
@@ -519,6 +992,16 @@ async def delete_contract(contract_id: str, current_user: dict = Depends(get_cur
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Contract not found")
+    invalidate_contract(contract_id)
+    
+    # History, comments, document versions and documents records kept outside the contract
+    # document go with it; blobs and chunks no longer referenced are collected by compaction
+    await asyncio.gather(
+        delete_activity(contract_id),
+        delete_comments(contract_id),
+        document_versions.delete_versions(contract_id),
+        db.documents.delete_many({"contract_id": contract_id})
+    )
     
     return {
         "success": True,
@@ -526,76 +1009,158 @@ async def delete_contract(contract_id: str, current_user: dict = Depends(get_cur
     }
 
 @router.put("/{contract_id}/status")
-async def update_contract_status(contract_id: str, status_update: StatusUpdateRequest, current_user: dict = Depends(get_current_user)):
+async def update_contract_status(
+    contract_id: str,
+    status_update: StatusUpdateRequest,
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
     """Update contract status with validation - only if user has access"""
     db = MongoDB.get_database()
     contracts_collection = db.contracts
     
-    # Get existing contract and check user access
-    existing = await contracts_collection.find_one({
-        "id": contract_id,
-        "$or": [
-            {"created_by": current_user["user_id"]},
-            {"shared_with": current_user["user_id"]}
-        ]
-    })
-    if not existing:
-        raise HTTPException(status_code=404, detail="Contract not found")
-    
-    # Validate status transition
-    valid_transitions = {
-        "Initiation": ["Preparation"],
-        "Preparation": ["Wire Details"],
-        "Wire Details": ["In Review"],
-        "In Review": ["Signatures"],
-        "Signatures": ["Funds Disbursed"],
-        "Funds Disbursed": ["Complete"]
-    }
-    
-    current_status = existing.get("status", "Initiation")
-    if status_update.status not in valid_transitions.get(current_status, []):
-        if status_update.status != current_status:  # Allow same status update
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid status transition from {current_status} to {status_update.status}"
-            )
+    query = merge_filters({"id": contract_id}, contract_access_filter(current_user))
+    version = expected_version(request)
+    new_status = status_update.status
+    
+    # Each allowed starting status is tried as a conditional update, so the
+    # transition is validated and applied atomically; the real transition
+    # comes first, then the same-status update
+    sources = [source for source, targets in VALID_STATUS_TRANSITIONS.items() if new_status in targets]
+    updated = None
+    for current_status in sources + [new_status]:
+        # Contracts without a status are treated as Initiation
+        status_filter = {"$in": [current_status, None]} if current_status == "Initiation" else current_status
+        activity = {
+            "id": str(ObjectId()),
+            "action": "Status updated",
+            "user": "System",
+            "timestamp": datetime.utcnow(),
+            "details": f"Status changed from {current_status} to {new_status}"
+        }
+        updated = await contracts_collection.find_one_and_update(
+            merge_filters(query, version_filter(version), {"status": status_filter}),
+            {
+                "$set": {"status": new_status, "updatedAt": datetime.utcnow()},
+                "$inc": {"version": 1},
+                "$push": {"activityLog": push_entry(activity, ACTIVITY_EMBEDDED_ENTRIES)}
+            },
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        if updated is not None:
+            break
+    invalidate_contract(contract_id)
+    
+    if updated is None:
+        # Nothing matched: tell a missing or modified contract apart from an invalid transition
+        existing = await raise_write_failure(contracts_collection, query, version)
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid status transition from {existing.get('status', 'Initiation')} to {new_status}"
+        )
+    await append_activity(contract_id, activity)
     
-    # Update status
-    update_dict = {
-        "status": status_update.status,
-        "updatedAt": datetime.utcnow()
+    return {
+        "success": True,
+        "message": "Status updated successfully",
+        "contract": updated
     }
+
+@router.post("/status/bulk")
+async def update_contract_statuses(status_update: BulkStatusUpdateRequest, current_user: dict = Depends(get_current_user)):
+    """Move many contracts to one status - only contracts the user has access to
+
+    Transitions are validated like PUT /{contract_id}/status and applied with a single
+    bulk_write. Each contract gets its own result; one failure does not stop the rest.
+    """
+    db = MongoDB.get_database()
+    contracts_collection = db.contracts
     
-    # Add activity log
-    if "activityLog" not in existing:
-        existing["activityLog"] = []
-    
-    existing["activityLog"].append({
-        "id": str(ObjectId()),
-        "action": "Status updated",
-        "user": "System",
-        "timestamp": datetime.utcnow(),
-        "details": f"Status changed from {current_status} to {status_update.status}"
-    })
-    
-    update_dict["activityLog"] = existing["activityLog"]
-    
-    result = await contracts_collection.update_one(
-        {"id": contract_id},
-        {"$set": update_dict}
-    )
+    new_status = status_update.status
+    contract_ids = list(dict.fromkeys(status_update.contractIds))
     
-    if result.modified_count == 0:
-        raise HTTPException(status_code=400, detail="Failed to update status")
+    # One read for every contract's current status and version
+    current = {}
+    async for contract in contracts_collection.find(
+        merge_filters({"id": {"$in": contract_ids}}, contract_access_filter(current_user)),
+        {"_id": 0, "id": 1, "status": 1, "version": 1}
+    ):
+        current[contract["id"]] = contract
     
-    # Return updated contract
-    updated = await contracts_collection.find_one({"id": contract_id})
-    updated.pop("_id", None)
+    results = {}
+    operations = []
+    activities = []
+    now = datetime.utcnow()
+    for contract_id in contract_ids:
+        contract = current.get(contract_id)
+        if contract is None:
+            results[contract_id] = {"id": contract_id, "success": False, "code": 404, "error": "Contract not found"}
+            continue
+        
+        current_status = contract.get("status") or "Initiation"
+        if new_status != current_status and new_status not in VALID_STATUS_TRANSITIONS.get(current_status, []):
+            results[contract_id] = {
+                "id": contract_id,
+                "success": False,
+                "code": 400,
+                "error": f"Invalid status transition from {current_status} to {new_status}"
+            }
+            continue
+        
+        activity = {
+            "id": str(ObjectId()),
+            "action": "Status updated",
+            "user": "System",
+            "timestamp": now,
+            "details": f"Status changed from {current_status} to {new_status}"
+        }
+        # Pinned to the version that was read, so a concurrent write makes this a no-op
+        operations.append(UpdateOne(
+            {"id": contract_id, **version_filter(contract.get("version", 0))},
+            {
+                "$set": {"status": new_status, "updatedAt": now},
+                "$inc": {"version": 1},
+                "$push": {"activityLog": push_entry(activity, ACTIVITY_EMBEDDED_ENTRIES)}
+            }
+        ))
+        activities.append((contract_id, activity))
+        results[contract_id] = {"id": contract_id, "success": True, "code": 200, "status": new_status}
+    
+    if operations:
+        result = await contracts_collection.bulk_write(operations, ordered=False)
+        for contract_id, _ in activities:
+            invalidate_contract(contract_id)
+        
+        if result.matched_count < len(operations):
+            # Some contracts changed since the read: the writes that applied carry their activity entry
+            applied = set()
+            # The id predicate keeps this on the unique id index
+            async for contract in contracts_collection.find(
+                {
+                    "id": {"$in": [contract_id for contract_id, _ in activities]},
+                    "activityLog.id": {"$in": [activity["id"] for _, activity in activities]}
+                },
+                {"_id": 0, "id": 1}
+            ):
+                applied.add(contract["id"])
+            for contract_id, _ in activities:
+                if contract_id not in applied:
+                    results[contract_id] = {
+                        "id": contract_id,
+                        "success": False,
+                        "code": 409,
+                        "error": "Contract was modified during the update, retry"
+                    }
+            activities = [(contract_id, activity) for contract_id, activity in activities if contract_id in applied]
+        
+        await append_activities(activities)
     
+    ordered = [results[contract_id] for contract_id in contract_ids]
     return {
-        "success": True,
-        "message": "Status updated successfully",
-        "contract": updated
+        "success": all(result["success"] for result in ordered),
+        "updated": sum(1 for result in ordered if result["success"]),
+        "results": ordered
     }
 
 @router.post("/{contract_id}/comments")
@@ -604,54 +1169,112 @@ async def add_contract_comment(contract_id: str, content: str, current_user: dic
     db = MongoDB.get_database()
     contracts_collection = db.contracts
     
-    # Check if contract exists and user has access
-    existing = await contracts_collection.find_one({
-        "id": contract_id,
-        "$or": [
-            {"created_by": current_user["user_id"]},
-            {"shared_with": current_user["user_id"]}
-        ]
-    })
-    if not existing:
-        raise HTTPException(status_code=404, detail="Contract not found")
-    
     # Create comment
     comment = ContractComment(
         content=content,
         author="Current User"  # This should come from authentication
     )
     
-    # Add comment to contract
-    if "comments" not in existing:
-        existing["comments"] = []
-    
-    existing["comments"].append(comment.dict())
-    
-    result = await contracts_collection.update_one(
-        {"id": contract_id},
-        {"$set": {"comments": existing["comments"], "updatedAt": datetime.utcnow()}}
+    # Append atomically and reserve the comment's sequence number - only if the
+    # contract exists and user has access
+    updated = await contracts_collection.find_one_and_update(
+        merge_filters({"id": contract_id}, contract_access_filter(current_user)),
+        {
+            "$push": {"comments": push_entry(comment.dict(), COMMENTS_EMBEDDED_ENTRIES)},
+            "$inc": {"commentCount": 1, "version": 1},
+            "$set": {"updatedAt": datetime.utcnow()}
+        },
+        projection={"_id": 0, "commentCount": 1},
+        return_document=ReturnDocument.AFTER
     )
+    invalidate_contract(contract_id)
     
-    if result.modified_count == 0:
-        raise HTTPException(status_code=400, detail="Failed to add comment")
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    await append_comment(contract_id, updated["commentCount"], comment.dict())
     
     return comment.dict()
 
+@router.get("/{contract_id}/comments")
+async def get_contract_comments(
+    contract_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(get_current_user_with_role)
+):
+    """Get a contract's comments, newest first - admins can see all, others need access
+
+    Pass the ``next`` value of the previous page as ``cursor`` to read older comments.
+    """
+    contract = await get_cached_contract(contract_id)
+    if not contract or not can_access_contract(contract, current_user):
+        raise HTTPException(status_code=404, detail="Contract not found")
+    
+    before = None
+    if cursor:
+        try:
+            before = decode_cursor(cursor, "seq", "desc")["value"]
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+    
+    comments = await get_comment_page(contract_id, limit, before=before)
+    
+    next_cursor = None
+    if len(comments) == limit and comments[-1]["seq"] > 1:
+        last = comments[-1]
+        next_cursor = encode_cursor("seq", "desc", last["seq"], last["id"])
+    
+    return ORJSONResponse({
+        "comments": comments,
+        "total": contract.get("commentCount", len(contract.get("comments", []))),
+        "next": next_cursor
+    })
+
+@router.get("/{contract_id}/activity")
+async def get_contract_activity(
+    contract_id: str,
+    before: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    current_user: dict = Depends(get_current_user_with_role)
+):
+    """Get a contract's activity history, newest first - admins can see all, others need access
+
+    ``before`` takes the ``next`` value of the previous page, or an ISO timestamp.
+    """
+    contract = await get_cached_contract(contract_id)
+    if not contract or not can_access_contract(contract, current_user):
+        raise HTTPException(status_code=404, detail="Contract not found")
+    
+    position = None
+    if before:
+        try:
+            cursor = decode_cursor(before, "timestamp", "desc")
+            position = (cursor["value"], cursor["id"])
+        except ValueError:
+            try:
+                timestamp = datetime.fromisoformat(before)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="before must be a cursor or an ISO timestamp")
+            # Activity timestamps are stored as naive UTC
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+            position = (timestamp, "")
+    
+    entries = await get_activity_page(contract_id, limit, before=position)
+    
+    next_cursor = None
+    if len(entries) == limit:
+        last = entries[-1]
+        next_cursor = encode_cursor("timestamp", "desc", last["timestamp"], last.get("id", ""))
+    
+    return ORJSONResponse({"activity": entries, "next": next_cursor})
+
 @router.get("/{contract_id}/tasks")
 async def get_contract_tasks(contract_id: str, current_user: dict = Depends(get_current_user)):
     """Get tasks for a contract - only if user has access"""
-    db = MongoDB.get_database()
-    contracts_collection = db.contracts
-    
     # Check access
-    contract = await contracts_collection.find_one({
-        "id": contract_id,
-        "$or": [
-            {"created_by": current_user["user_id"]},
-            {"shared_with": current_user["user_id"]}
-        ]
-    })
-    if not contract:
+    contract = await get_cached_contract(contract_id)
+    if not contract or not can_access_contract(contract, current_user):
         raise HTTPException(status_code=404, detail="Contract not found")
     
     tasks = contract.get("tasks", [])
@@ -664,42 +1287,441 @@ async def upload_contract_document(
     file: UploadFile = File(...),
     current_user: dict = Depends(get_current_user)
 ):
-    """Upload a document for a contract - only if user has access"""
+    """Upload a document for a contract - only if user has access
+
+    The bytes are streamed into the content-addressed blob store; identical files
+    are stored once however many contracts they are attached to. PDFs are then
+    queued for background processing.
+    """
+    # Reject before storing anything; the write below re-checks access atomically
+    contract = await get_cached_contract(contract_id)
+    if not contract or not can_access_contract(contract, current_user):
+        raise HTTPException(status_code=404, detail="Contract not found")
+    
+    digest, size, _ = await blob_store.save_stream(file.read)
+    
+    return await attach_document(contract_id, current_user, file.filename, file.content_type, size, digest)
+
+# Helper function to name the documents record that mirrors a contract document
+def document_code(document_id: str) -> str:
+    return f"DOC-{document_id}"
+
+# Helper function to add a stored blob to a contract's documents
+async def attach_document(
+    contract_id: str,
+    current_user: dict,
+    name: str,
+    content_type: str,
+    size: int,
+    digest: str
+) -> Dict[str, Any]:
     db = MongoDB.get_database()
-    contracts_collection = db.contracts
     
-    # Check if contract exists and user has access
-    existing = await contracts_collection.find_one({
-        "id": contract_id,
-        "$or": [
-            {"created_by": current_user["user_id"]},
-            {"shared_with": current_user["user_id"]}
-        ]
+    # Create document record
+    document = ContractDocument(
+        name=name,
+        type=content_type,
+        size=size,
+        hash=digest,
+        status="uploaded"
+    )
+    document.url = f"/api/contracts/{contract_id}/documents/{document.id}"
+    
+    # Append atomically - only if the contract exists and user has access
+    result = await db.contracts.update_one(
+        merge_filters({"id": contract_id}, contract_access_filter(current_user)),
+        {
+            "$push": {"documentsList": document.dict()},
+            "$set": {"updatedAt": datetime.utcnow()},
+            "$inc": {"version": 1}
+        }
+    )
+    invalidate_contract(contract_id)
+    
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Contract not found")
+    
+    # The documents record carries DocumentMetadata, hash included; background
+    # processing fills in its pages and text by that hash
+    await db.documents.insert_one({
+        "code": document_code(document.id),
+        "contract_id": contract_id,
+        "name": name,
+        "type": content_type,
+        "status": "Active",
+        "url": document.url,
+        "metadata": {
+            "size": size,
+            "mime_type": content_type or "application/octet-stream",
+            "hash": digest,
+            "original_name": name,
+            "uploaded_by": current_user["user_id"],
+            "version": 1,
+            "pages": None,
+            "dimensions": None,
+            "ocr_text": None,
+        },
+        "version_history": [],
+        "tags": [],
+        "custom_fields": {},
+        "created_by": current_user["user_id"],
+        "updated_by": current_user["user_id"],
+        "created_at": document.uploadedAt,
+        "updated_at": document.uploadedAt,
     })
-    if not existing:
+    
+    # Page count, text and thumbnail are extracted in the background
+    if is_processable(document.type, document.name):
+        document_processor.submit(contract_id, document.id, digest)
+    
+    return document.dict()
+
+# Helper function to describe an upload session to the client
+def upload_session_response(session: Dict[str, Any], status_code: int = 200) -> ORJSONResponse:
+    return ORJSONResponse(
+        {
+            "id": session["id"],
+            "name": session["name"],
+            "size": session["size"],
+            "offset": session["offset"],
+            "expiresAt": session["expiresAt"],
+        },
+        status_code=status_code,
+        headers={"Upload-Offset": str(session["offset"]), "Cache-Control": "no-store"}
+    )
+
+# Helper function to load an upload session or fail with 404
+async def require_upload_session(contract_id: str, upload_id: str, current_user: dict) -> Dict[str, Any]:
+    session = await uploads.get_session(upload_id, contract_id, current_user["user_id"])
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return session
+
+@router.post("/{contract_id}/uploads")
+async def create_upload_session(
+    contract_id: str,
+    upload: UploadSessionRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """Start a resumable document upload - only if user has access
+
+    Send the bytes with PUT /uploads/{upload_id}?offset=N in as many requests as
+    needed, then POST /uploads/{upload_id}/complete. The session expires after
+    UPLOAD_SESSION_TTL_HOURS.
+    """
+    contract = await get_cached_contract(contract_id)
+    if not contract or not can_access_contract(contract, current_user):
         raise HTTPException(status_code=404, detail="Contract not found")
     
-    # Create document record
-    document = ContractDocument(
-        name=file.filename,
-        type=file.content_type,
-        size=file.size,
-        status="uploaded",
-        url=f"/api/contracts/{contract_id}/documents/{file.filename}"  # This would be a real file storage URL
+    if upload.size > uploads.UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Uploads are limited to {uploads.UPLOAD_MAX_BYTES} bytes")
+    
+    session = await uploads.create_session(
+        contract_id, current_user["user_id"], upload.name, upload.type, upload.size, upload.sha256
     )
+    return upload_session_response(session, status_code=201)
+
+@router.get("/{contract_id}/uploads/{upload_id}")
+async def get_upload_session(contract_id: str, upload_id: str, current_user: dict = Depends(get_current_user)):
+    """Get how many bytes of an upload have been received, to resume after a failure"""
+    session = await require_upload_session(contract_id, upload_id, current_user)
+    return upload_session_response(session)
+
+@router.put("/{contract_id}/uploads/{upload_id}")
+async def upload_chunk(
+    contract_id: str,
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    current_user: dict = Depends(get_current_user)
+):
+    """Write the request body at ``offset`` of an upload
+
+    ``offset`` must equal the bytes received so far; otherwise 409 with the
+    current offset in the Upload-Offset header.
+    """
+    session = await require_upload_session(contract_id, upload_id, current_user)
+    
+    conflict_headers = {"Upload-Offset": str(session["offset"])}
+    if offset != session["offset"]:
+        raise HTTPException(status_code=409, detail="Offset does not match the bytes received", headers=conflict_headers)
+    
+    try:
+        updated = await uploads.write_chunk(session, offset, request.stream())
+    except uploads.ChunkTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    if updated is None:
+        raise HTTPException(status_code=409, detail="Upload was written concurrently", headers=conflict_headers)
+    
+    return upload_session_response(updated)
+
+@router.post("/{contract_id}/uploads/{upload_id}/complete")
+async def complete_upload(
+    contract_id: str,
+    upload_id: str,
+    completion: Optional[UploadCompleteRequest] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Verify a finished upload against its SHA-256 and add it to the contract's documents
+
+    The hash may be given when the session is created or here; if both are
+    given they must agree.
+    """
+    session = await require_upload_session(contract_id, upload_id, current_user)
+    
+    if session["offset"] != session["size"]:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload incomplete: {session['offset']} of {session['size']} bytes received",
+            headers={"Upload-Offset": str(session["offset"])}
+        )
     
-    # Add document to contract
-    if "documentsList" not in existing:
-        existing["documentsList"] = []
+    expected = completion.sha256 if completion else None
+    if session.get("sha256") and expected and expected != session["sha256"]:
+        raise HTTPException(status_code=400, detail="SHA-256 differs from the one given when the upload started")
+    expected = expected or session.get("sha256")
+    if not expected:
+        raise HTTPException(status_code=400, detail="SHA-256 of the file is required")
+    
+    try:
+        digest = await uploads.finalize_session(session, expected)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if digest is None:
+        # Only the request that completed the session attaches the document
+        raise HTTPException(status_code=409, detail="Upload was already completed")
+    
+    return await attach_document(contract_id, current_user, session["name"], session["type"], session["size"], digest)
+
+@router.delete("/{contract_id}/uploads/{upload_id}")
+async def abort_upload(contract_id: str, upload_id: str, current_user: dict = Depends(get_current_user)):
+    """Abandon an upload and discard the bytes received"""
+    session = await require_upload_session(contract_id, upload_id, current_user)
+    await uploads.abort_session(session)
+    return {"message": "Upload aborted"}
+
+@router.get("/{contract_id}/documents/{document_id}")
+async def download_contract_document(
+    contract_id: str,
+    document_id: str,
+    request: Request,
+    current_user: dict = Depends(get_current_user_with_role)
+):
+    """Download a contract document - admins can see all, others need access
+
+    Honours a single-range Range header (206) and If-None-Match (304). The ETag is
+    the content hash. A new version replaces the bytes behind this URL, so clients
+    must revalidate; /versions/{n} URLs never change and are cached as immutable.
+    """
+    contract = await get_cached_contract(contract_id)
+    if not contract or not can_access_contract(contract, current_user):
+        raise HTTPException(status_code=404, detail="Contract not found")
     
-    existing["documentsList"].append(document.dict())
+    document = find_document(contract, document_id)
+    return await document_file_response(request, document, document["hash"], cache_control="private, no-cache")
+
+# Helper function to find a stored document on a contract or fail with 404
+def find_document(contract: Dict[str, Any], document_id: str) -> Dict[str, Any]:
+    document = next((doc for doc in contract.get("documentsList", []) if doc.get("id") == document_id), None)
+    if not document or not document.get("hash"):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return document
+
+# Helper function to send one version of a document, whole or as a byte range
+async def document_file_response(
+    request: Request,
+    document: Dict[str, Any],
+    digest: str,
+    chunks: Optional[List[List[Any]]] = None,
+    cache_control: str = "private, max-age=31536000, immutable"
+) -> Response:
+    try:
+        path = blob_store.path_for(digest)
+        size = os.stat(path).st_size
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Document not found")
+    except FileNotFoundError:
+        # Superseded versions keep only their chunks
+        path = None
+        if chunks is None:
+            chunked = await document_versions.find_chunked_copy(digest)
+            chunks = chunked["chunks"] if chunked else None
+        if chunks is None:
+            raise HTTPException(status_code=404, detail="Document not found")
+        size = sum(chunk_size for _, chunk_size in chunks)
+    
+    etag = f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Vary": "Authorization",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    byte_range = None
+    if range_applies(request.headers, etag):
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    
+    headers["Content-Disposition"] = content_disposition("inline", document.get("name") or document["id"])
+    media_type = document.get("type") or "application/octet-stream"
+    if path is not None:
+        return RangeFileResponse(path, size, byte_range=byte_range, headers=headers, media_type=media_type)
+    
+    # Rebuild from chunks as the response is sent; StreamingResponse reads them in a thread
+    start, end = byte_range if byte_range else (0, size - 1)
+    headers["Accept-Ranges"] = "bytes"
+    headers["Content-Length"] = str(end - start + 1 if size else 0)
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return StreamingResponse(
+        document_versions.iter_chunks(chunks, start, end) if size else iter(()),
+        status_code=206 if byte_range else 200,
+        headers=headers,
+        media_type=media_type
+    )
+
+@router.post("/{contract_id}/documents/{document_id}/versions")
+async def upload_document_version(
+    contract_id: str,
+    document_id: str,
+    file: UploadFile = File(...),
+    current_user: dict = Depends(get_current_user)
+):
+    """Upload a new version of a contract document - only if user has access
+
+    The new file becomes the document's current file. Every version is also stored
+    as content-defined chunks shared with the versions before it, so a redline round
+    only adds the parts of the file that changed.
+    """
+    db = MongoDB.get_database()
     
-    result = await contracts_collection.update_one(
-        {"id": contract_id},
-        {"$set": {"documentsList": existing["documentsList"], "updatedAt": datetime.utcnow()}}
+    contract = await get_cached_contract(contract_id)
+    if not contract or not can_access_contract(contract, current_user):
+        raise HTTPException(status_code=404, detail="Contract not found")
+    document = find_document(contract, document_id)
+    
+    digest, size, _ = await blob_store.save_stream(file.read)
+    if digest == document["hash"]:
+        return document
+    
+    current_version = document.get("version", 1)
+    # Documents get their first version record when they are first revised
+    if await document_versions.get_version(contract_id, document_id, current_version) is None:
+        try:
+            await document_versions.record_version(
+                contract_id, document_id, current_version, document["hash"], document.get("size", 0),
+                uploaded_by=None, uploaded_at=document.get("uploadedAt")
+            )
+        except DuplicateKeyError:
+            pass
+    try:
+        record = await document_versions.record_version(
+            contract_id, document_id, current_version + 1, digest, size, current_user["user_id"]
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Another version of this document was uploaded at the same time")
+    
+    fields = {
+        "hash": digest,
+        "size": size,
+        "version": record["version"],
+        "status": "uploaded",
+        "uploadedAt": record["uploadedAt"],
+        "pages": None,
+        "dimensions": None,
+        "thumbnailHash": None,
+    }
+    # Only replace the version this upload was based on
+    result = await db.contracts.update_one(
+        merge_filters(
+            {"id": contract_id, "documentsList": {"$elemMatch": {"id": document_id, "hash": document["hash"]}}},
+            contract_access_filter(current_user)
+        ),
+        {
+            "$set": {**{f"documentsList.$.{key}": value for key, value in fields.items()}, "updatedAt": datetime.utcnow()},
+            "$inc": {"version": 1}
+        }
+    )
+    invalidate_contract(contract_id)
+    
+    if result.matched_count == 0:
+        await db.document_versions.delete_one({"contract_id": contract_id, "document_id": document_id, "version": record["version"]})
+        raise HTTPException(status_code=409, detail="Another version of this document was uploaded at the same time")
+    
+    # Earlier versions are listed by document_versions; the record keeps the current one
+    await db.documents.update_one(
+        {"code": document_code(document_id)},
+        {"$set": {
+            "metadata.hash": digest,
+            "metadata.size": size,
+            "metadata.version": record["version"],
+            "metadata.pages": None,
+            "metadata.dimensions": None,
+            "metadata.ocr_text": None,
+            "updated_by": current_user["user_id"],
+            "updated_at": record["uploadedAt"],
+        }}
     )
     
-    if result.modified_count == 0:
-        raise HTTPException(status_code=400, detail="Failed to add document")
+    if is_processable(document.get("type"), document.get("name")):
+        document_processor.submit(contract_id, document_id, digest)
+    
+    return {**document, **fields}
+
+@router.get("/{contract_id}/documents/{document_id}/versions")
+async def get_document_versions(contract_id: str, document_id: str, current_user: dict = Depends(get_current_user_with_role)):
+    """Get the version history of a contract document - admins can see all, others need access"""
+    db = MongoDB.get_database()
+    
+    contract = await get_cached_contract(contract_id)
+    if not contract or not can_access_contract(contract, current_user):
+        raise HTTPException(status_code=404, detail="Contract not found")
+    document = find_document(contract, document_id)
+    
+    versions = await db.document_versions.find(
+        {"contract_id": contract_id, "document_id": document_id},
+        {"_id": 0, "contract_id": 0, "document_id": 0, "chunks": 0}
+    ).sort("version", 1).to_list(length=None)
+    if not versions:
+        # Never revised: the current file is the only version
+        versions = [{
+            "version": document.get("version", 1),
+            "hash": document["hash"],
+            "size": document.get("size"),
+            "uploadedBy": None,
+            "uploadedAt": document.get("uploadedAt"),
+        }]
+    
+    for version in versions:
+        version["url"] = f"/api/contracts/{contract_id}/documents/{document_id}/versions/{version['version']}"
+    return {"versions": versions}
+
+@router.get("/{contract_id}/documents/{document_id}/versions/{version}")
+async def download_document_version(
+    contract_id: str,
+    document_id: str,
+    version: int,
+    request: Request,
+    current_user: dict = Depends(get_current_user_with_role)
+):
+    """Download one version of a contract document - admins can see all, others need access
+
+    Older versions are reassembled from their chunks while streaming; Range and
+    If-None-Match work as for the current file.
+    """
+    contract = await get_cached_contract(contract_id)
+    if not contract or not can_access_contract(contract, current_user):
+        raise HTTPException(status_code=404, detail="Contract not found")
+    document = find_document(contract, document_id)
+    
+    record = await document_versions.get_version(contract_id, document_id, version)
+    if record is None:
+        if version != document.get("version", 1):
+            raise HTTPException(status_code=404, detail="Document version not found")
+        record = {"hash": document["hash"], "chunks": None}
     
-    return document.dict()
\ No newline at end of file
+    return await document_file_response(request, document, record["hash"], record.get("chunks"))
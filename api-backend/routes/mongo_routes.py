@@ -1,8 +1,14 @@
 from fastapi import APIRouter, HTTPException
+import asyncio
 from db.mongodb import MongoDB
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field
 from datetime import datetime
+from services.activity_log import delete_activity
+from services.comments import delete_comments
+from services.document_versions import delete_versions
+from services.contract_cache import invalidate_contract
+from utils.ids import new_contract_id
 
 router = APIRouter(prefix="/api/mongo", tags=["mongodb"])
 
@@ -37,8 +43,8 @@ class Party(BaseModel):
     address: Optional[str] = None
 
 class Contract(BaseModel):
-    id: str = Field(default_factory=lambda: f"CNT-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}")
-    code: str = Field(default_factory=lambda: f"CNT-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}")
+    id: str = Field(default_factory=new_contract_id)
+    code: str = Field(default_factory=new_contract_id)
     title: str
     type: str
     status: str = Field(default="Initiation")
@@ -211,6 +217,13 @@ async def delete_contract(contract_id: str):
         result = await contracts_collection.delete_one({"id": contract_id})
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Contract not found")
+        invalidate_contract(contract_id)
+        await asyncio.gather(
+            delete_activity(contract_id),
+            delete_comments(contract_id),
+            delete_versions(contract_id),
+            db.documents.delete_many({"contract_id": contract_id})
+        )
         return {"message": "Contract deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
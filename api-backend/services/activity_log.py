@@ -0,0 +1,113 @@
+"""Bucketed storage for contract activity logs.
+
+Full activity history lives in the ``contract_activity`` collection, one
+bucket document per contract and time range holding up to
+``ACTIVITY_BUCKET_SIZE`` entries in append order. Contracts only embed the
+newest ``ACTIVITY_EMBEDDED_ENTRIES`` entries in ``activityLog`` so detail
+reads stay small and documents stay far from the 16 MB limit.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from db.mongodb import MongoDB
+
+ACTIVITY_BUCKET_SIZE = int(os.getenv("ACTIVITY_BUCKET_SIZE", "200"))
+ACTIVITY_EMBEDDED_ENTRIES = int(os.getenv("ACTIVITY_EMBEDDED_ENTRIES", "20"))
+
+
+def _append_update(contract_id: str, entry: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Filter and update that push one entry into the contract's open bucket.
+
+    Upserting opens a new bucket once every existing one is full.
+    """
+    timestamp = entry["timestamp"]
+    return (
+        {"contract_id": contract_id, "count": {"$lt": ACTIVITY_BUCKET_SIZE}},
+        {
+            "$push": {"entries": entry},
+            "$inc": {"count": 1},
+            "$min": {"start": timestamp},
+            "$max": {"end": timestamp},
+        },
+    )
+
+
+async def append_activity(contract_id: str, entry: Dict[str, Any]) -> None:
+    """Append an activity entry to a contract's history."""
+    db = MongoDB.get_database()
+    bucket_filter, update = _append_update(contract_id, entry)
+    await db.contract_activity.update_one(bucket_filter, update, upsert=True)
+
+
+async def append_activities(entries: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+    """Append many ``(contract_id, entry)`` pairs in one bulk write."""
+    operations = [
+        UpdateOne(*_append_update(contract_id, entry), upsert=True)
+        for contract_id, entry in entries
+    ]
+    if operations:
+        db = MongoDB.get_database()
+        # Ordered, so entries for the same contract keep their order across buckets
+        await db.contract_activity.bulk_write(operations, ordered=True)
+
+
+async def start_activities(entries: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+    """Open the first bucket for newly created contracts in one unordered insert."""
+    buckets = [
+        {
+            "contract_id": contract_id,
+            "entries": [entry],
+            "count": 1,
+            "start": entry["timestamp"],
+            "end": entry["timestamp"],
+        }
+        for contract_id, entry in entries
+    ]
+    if buckets:
+        db = MongoDB.get_database()
+        await db.contract_activity.insert_many(buckets, ordered=False)
+
+
+def _sort_key(entry: Dict[str, Any]) -> Tuple[datetime, str]:
+    return entry["timestamp"], entry.get("id", "")
+
+
+async def get_activity_page(
+    contract_id: str,
+    limit: int,
+    before: Optional[Tuple[datetime, str]] = None,
+) -> List[Dict[str, Any]]:
+    """Return up to ``limit`` entries older than ``before`` (timestamp, id), newest first.
+
+    Buckets are read newest-first and reading stops as soon as no remaining
+    bucket can hold an entry for the page, so a page touches roughly
+    ``limit / ACTIVITY_BUCKET_SIZE + 1`` buckets however long the history is.
+    """
+    db = MongoDB.get_database()
+    query: Dict[str, Any] = {"contract_id": contract_id}
+    if before is not None:
+        query["start"] = {"$lte": before[0]}
+
+    collected: List[Dict[str, Any]] = []
+    cursor = db.contract_activity.find(query, {"_id": 0, "entries": 1, "end": 1}).sort("end", -1)
+    async for bucket in cursor:
+        if len(collected) >= limit and bucket["end"] < collected[limit - 1]["timestamp"]:
+            break
+        for entry in bucket["entries"]:
+            if before is None or _sort_key(entry) < before:
+                collected.append(entry)
+        collected.sort(key=_sort_key, reverse=True)
+
+    return collected[:limit]
+
+
+async def delete_activity(contract_id: str) -> None:
+    """Remove every activity bucket of a deleted contract."""
+    db = MongoDB.get_database()
+    await db.contract_activity.delete_many({"contract_id": contract_id})
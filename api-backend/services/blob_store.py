@@ -0,0 +1,110 @@
+"""Content-addressed storage for uploaded document bytes on the local disk.
+
+Each blob is stored once, under its SHA-256 digest, at
+``<BLOB_STORE_DIR>/<aa>/<bb>/<digest>``. Uploads are streamed through a
+staging file in fixed-size chunks while the digest is computed, then moved
+into place with an atomic rename. An upload whose digest already exists is
+dropped, so identical files uploaded to different contracts share one copy.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import uuid
+from typing import Awaitable, Callable, Optional, Tuple
+
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", "data/blobs")
+BLOB_CHUNK_SIZE = int(os.getenv("BLOB_CHUNK_SIZE", str(1024 * 1024)))
+
+ReadChunk = Callable[[int], Awaitable[bytes]]
+
+
+class BlobStore:
+    """SHA-256 addressed blobs under one root directory."""
+
+    def __init__(self, root: str, chunk_size: int = BLOB_CHUNK_SIZE):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.staging_dir = os.path.join(root, "staging")
+
+    def path_for(self, digest: str) -> str:
+        """Return where the blob with this hex digest is (or would be) stored."""
+        if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+            raise ValueError("Not a SHA-256 hex digest")
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path_for(digest))
+
+    def staging_path(self, name: Optional[str] = None) -> str:
+        """Return a path in the staging directory, creating the directory if needed."""
+        os.makedirs(self.staging_dir, exist_ok=True)
+        return os.path.join(self.staging_dir, name or uuid.uuid4().hex)
+
+    def commit(self, staged: str, digest: str) -> bool:
+        """Move a fully written staging file into place under its digest.
+
+        Returns False when the blob was already stored; the staging file is
+        removed either way. A blob stored again counts as new for the
+        garbage collection grace period in compact_document_versions.py.
+        """
+        final = self.path_for(digest)
+        if os.path.exists(final):
+            try:
+                os.utime(final)
+                os.unlink(staged)
+                return False
+            except FileNotFoundError:
+                pass  # collected in the meantime: store this copy
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        # Concurrent uploads of the same bytes race harmlessly: same name, same content
+        os.replace(staged, final)
+        return True
+
+    def save_bytes(self, data: bytes) -> Tuple[str, int, bool]:
+        """Store a small in-memory blob (thumbnails and the like); blocking."""
+        digest = hashlib.sha256(data).hexdigest()
+        try:
+            os.utime(self.path_for(digest))
+            return digest, len(data), False
+        except FileNotFoundError:
+            pass
+        staged = self.staging_path()
+        with open(staged, "wb") as out:
+            out.write(data)
+        return digest, len(data), self.commit(staged, digest)
+
+    async def save_stream(self, read: ReadChunk) -> Tuple[str, int, bool]:
+        """Store everything ``read(chunk_size)`` returns until it returns b"".
+
+        Only one chunk is held in memory at a time. Returns ``(digest, size,
+        created)``, where ``created`` is False if the blob already existed.
+        """
+        staged = self.staging_path()
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            with open(staged, "wb") as out:
+                def absorb(chunk: bytes) -> None:
+                    # hashlib releases the GIL for large buffers, so both run off the event loop
+                    hasher.update(chunk)
+                    out.write(chunk)
+
+                while True:
+                    chunk = await read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    await asyncio.to_thread(absorb, chunk)
+            digest = hasher.hexdigest()
+            created = await asyncio.to_thread(self.commit, staged, digest)
+        except BaseException:
+            if os.path.exists(staged):
+                os.unlink(staged)
+            raise
+        return digest, size, created
+
+
+blob_store = BlobStore(BLOB_STORE_DIR)
@@ -0,0 +1,60 @@
+"""Bucketed storage for contract comments.
+
+Every comment gets a per-contract sequence number from the contract's
+``commentCount`` and is stored in the ``contract_comments`` bucket
+``(seq - 1) // COMMENT_BUCKET_SIZE``. Appending is a single upsert and a page
+of comments reads one or two buckets by number. Contracts only embed the
+newest ``COMMENTS_EMBEDDED_ENTRIES`` comments in ``comments``.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Optional
+
+from db.mongodb import MongoDB
+
+COMMENT_BUCKET_SIZE = int(os.getenv("COMMENT_BUCKET_SIZE", "100"))
+COMMENTS_EMBEDDED_ENTRIES = int(os.getenv("COMMENTS_EMBEDDED_ENTRIES", "20"))
+
+
+def bucket_for(seq: int) -> int:
+    """Return the bucket number holding comment ``seq`` (1-based)."""
+    return (seq - 1) // COMMENT_BUCKET_SIZE
+
+
+async def append_comment(contract_id: str, seq: int, comment: Dict[str, Any]) -> None:
+    """Store a comment under the sequence number reserved on the contract."""
+    db = MongoDB.get_database()
+    await db.contract_comments.update_one(
+        {"contract_id": contract_id, "bucket": bucket_for(seq)},
+        {"$push": {"entries": {**comment, "seq": seq}}, "$inc": {"count": 1}},
+        upsert=True
+    )
+
+
+async def get_comment_page(contract_id: str, limit: int, before: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Return up to ``limit`` comments with ``seq`` below ``before``, newest first."""
+    db = MongoDB.get_database()
+    query: Dict[str, Any] = {"contract_id": contract_id}
+    if before is not None:
+        if before <= 1:
+            return []
+        query["bucket"] = {"$lte": bucket_for(before - 1)}
+
+    collected: List[Dict[str, Any]] = []
+    cursor = db.contract_comments.find(query, {"_id": 0, "entries": 1}).sort("bucket", -1)
+    async for bucket in cursor:
+        # Concurrent appends can land out of order within a bucket
+        entries = sorted(bucket["entries"], key=lambda entry: entry["seq"], reverse=True)
+        collected.extend(entry for entry in entries if before is None or entry["seq"] < before)
+        if len(collected) >= limit:
+            break
+
+    return collected[:limit]
+
+
+async def delete_comments(contract_id: str) -> None:
+    """Remove every comment bucket of a deleted contract."""
+    db = MongoDB.get_database()
+    await db.contract_comments.delete_many({"contract_id": contract_id})
@@ -0,0 +1,107 @@
+"""Read-through cache of contract documents for the contracts routes."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from pymongo.errors import PyMongoError
+
+from db.mongodb import MongoDB
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+CONTRACT_CACHE_SIZE = int(os.getenv("CONTRACT_CACHE_SIZE", "2000"))
+CONTRACT_CACHE_TTL_SECONDS = float(os.getenv("CONTRACT_CACHE_TTL_SECONDS", "10"))
+CONTRACT_CACHE_CHANGE_STREAM = os.getenv("CONTRACT_CACHE_CHANGE_STREAM", "false").lower() == "true"
+
+# Contract documents keyed by contract id. Without the change-stream listener,
+# writes made by other workers become visible here once the TTL expires.
+contract_cache = TTLCache(maxsize=CONTRACT_CACHE_SIZE, ttl=CONTRACT_CACHE_TTL_SECONDS)
+
+# Mongo _id -> contract id for cached entries; change events only carry _id
+_contract_ids = TTLCache(maxsize=CONTRACT_CACHE_SIZE, ttl=CONTRACT_CACHE_TTL_SECONDS)
+
+# Bumped on every invalidation. A read-through only stores its result if no
+# invalidation happened while it waited on Mongo, so a read that started
+# before a write cannot put the old document back after the write dropped it.
+_generation = 0
+
+
+async def get_cached_contract(contract_id: str) -> Optional[Dict[str, Any]]:
+    """Return the stored contract document, reading through the cache.
+
+    The returned dict is shared with the cache: copy it before changing it,
+    and check access with ``can_access_contract`` before returning it.
+    """
+    contract = contract_cache.get(contract_id)
+    if contract is not None:
+        return contract
+
+    generation = _generation
+    db = MongoDB.get_database()
+    contract = await db.contracts.find_one({"id": contract_id})
+    if contract and generation == _generation:
+        contract_cache.set(contract_id, contract)
+        _contract_ids.set(contract["_id"], contract_id)
+    return contract
+
+
+def can_access_contract(contract: Dict[str, Any], current_user: dict) -> bool:
+    """Apply the per-user access rule to a contract document."""
+    if current_user.get("is_admin"):
+        return True
+    user_id = current_user["user_id"]
+    return contract.get("created_by") == user_id or user_id in contract.get("shared_with", [])
+
+
+def invalidate_contract(contract_id: str) -> None:
+    """Drop a contract from this worker's cache after it changes."""
+    _next_generation()
+    contract = contract_cache.pop(contract_id)
+    if contract is not None:
+        _contract_ids.pop(contract["_id"])
+
+
+def _next_generation() -> None:
+    global _generation
+    _generation += 1
+
+
+def _clear_contracts() -> None:
+    _next_generation()
+    contract_cache.clear()
+    _contract_ids.clear()
+
+
+async def watch_contract_changes() -> None:
+    """Invalidate cached contracts on changes made by any worker.
+
+    Requires a replica set or sharded cluster. Runs until cancelled and
+    reconnects after errors; the whole cache is dropped on every (re)start
+    because events may have been missed in between.
+    """
+    while True:
+        try:
+            db = MongoDB.get_database()
+            pipeline = [{"$project": {"documentKey": 1, "operationType": 1}}]
+            async with db.contracts.watch(pipeline) as stream:
+                _clear_contracts()
+                async for change in stream:
+                    object_id = change.get("documentKey", {}).get("_id")
+                    contract_id = _contract_ids.get(object_id)
+                    if contract_id is not None:
+                        invalidate_contract(contract_id)
+                    elif change.get("operationType") in ("drop", "rename", "dropDatabase", "invalidate"):
+                        _clear_contracts()
+                    else:
+                        # Not cached here, but a read of it may be in flight
+                        _next_generation()
+        except asyncio.CancelledError:
+            raise
+        except (PyMongoError, RuntimeError) as exc:
+            logger.warning(f"Contract change stream stopped, retrying: {exc}")
+            await asyncio.sleep(5)
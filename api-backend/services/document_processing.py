@@ -0,0 +1,279 @@
+"""Background extraction of page count, text and a thumbnail from uploaded PDFs.
+
+Uploads call ``document_processor.submit`` and return immediately. Jobs run
+on a ProcessPoolExecutor (one process per core by default) and results are
+written back in batches:
+
+- the contract's ``documentsList`` entry gets ``pages``, ``dimensions``,
+  ``thumbnailHash`` and status ``processed`` (or ``failed``)
+- ``document_analysis`` keeps the extracted text once per content hash, so
+  the same file attached to many contracts is only processed once
+- ``documents`` records with the same ``metadata.hash`` get ``pages``,
+  ``dimensions`` and ``ocr_text`` filled in
+
+PDFs are read with PyMuPDF, which parses compressed object streams and
+cross-reference streams as well as classic files.
+
+Jobs are queued in memory, but a document keeps status ``uploaded`` until
+its result is written, so nothing is lost: ``start()`` re-queues every
+processable document still ``uploaded``, and when the queue is full the
+document is left ``uploaded`` and picked up by the same scan once the queue
+has room again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import fitz  # PyMuPDF
+from pymongo import UpdateMany, UpdateOne
+
+from db.mongodb import MongoDB
+from services.blob_store import BLOB_STORE_DIR, BlobStore
+from services.contract_cache import invalidate_contract
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_WORKERS = int(os.getenv("DOCUMENT_WORKERS", "0")) or os.cpu_count() or 1
+DOCUMENT_QUEUE_SIZE = int(os.getenv("DOCUMENT_QUEUE_SIZE", "10000"))
+DOCUMENT_BATCH_SIZE = int(os.getenv("DOCUMENT_BATCH_SIZE", "100"))
+DOCUMENT_BATCH_SECONDS = float(os.getenv("DOCUMENT_BATCH_SECONDS", "1.0"))
+# Wait before re-scanning for documents left behind by a full queue
+DOCUMENT_RETRY_SECONDS = float(os.getenv("DOCUMENT_RETRY_SECONDS", "30"))
+DOCUMENT_TEXT_MAX_CHARS = int(os.getenv("DOCUMENT_TEXT_MAX_CHARS", "1000000"))
+THUMBNAIL_WIDTH = int(os.getenv("THUMBNAIL_WIDTH", "256"))
+
+PDF_TYPES = {"application/pdf", "application/x-pdf"}
+
+
+def _pdf_info(path: str) -> Dict[str, Any]:
+    with fitz.open(path, filetype="pdf") as pdf:
+        text_parts: List[str] = []
+        remaining = DOCUMENT_TEXT_MAX_CHARS
+        for page in pdf:
+            if remaining <= 0:
+                break
+            page_text = page.get_text()[:remaining]
+            text_parts.append(page_text)
+            remaining -= len(page_text)
+
+        dimensions = None
+        thumbnail = None
+        if pdf.page_count:
+            first = pdf[0]
+            dimensions = {"width": round(first.rect.width), "height": round(first.rect.height)}
+            scale = THUMBNAIL_WIDTH / first.rect.width if first.rect.width else 1
+            thumbnail = first.get_pixmap(matrix=fitz.Matrix(scale, scale)).tobytes("png")
+
+        return {
+            "pages": pdf.page_count,
+            "dimensions": dimensions,
+            "text": "".join(text_parts),
+            "thumbnail": thumbnail,
+        }
+
+
+def process_document(path: str, blob_root: str = BLOB_STORE_DIR) -> Dict[str, Any]:
+    """Analyse one PDF; runs in a worker process.
+
+    The thumbnail PNG goes straight into the blob store, so only small
+    results travel back to the event loop.
+    """
+    info = _pdf_info(path)
+    thumbnail = info.pop("thumbnail")
+    info["thumbnailHash"] = BlobStore(blob_root).save_bytes(thumbnail)[0] if thumbnail else None
+    return info
+
+
+def is_processable(content_type: Optional[str], name: Optional[str]) -> bool:
+    return content_type in PDF_TYPES or (name or "").lower().endswith(".pdf")
+
+
+class DocumentProcessor:
+    """Queue of uploaded documents feeding a process pool and a batching writer."""
+
+    def __init__(self, workers: int = DOCUMENT_WORKERS, blob_root: str = BLOB_STORE_DIR):
+        self.workers = workers
+        self.blob_root = blob_root
+        self.jobs: asyncio.Queue = asyncio.Queue(maxsize=DOCUMENT_QUEUE_SIZE)
+        self.results: asyncio.Queue = asyncio.Queue()
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.tasks: List[asyncio.Task] = []
+        # Jobs queued or running whose result is not written yet
+        self.pending: Set[Tuple[str, str, str]] = set()
+        self.retry = asyncio.Event()
+
+    def submit(self, contract_id: str, document_id: str, digest: str) -> bool:
+        """Queue a stored document for processing without waiting.
+
+        Returns False when the queue is full; the document stays ``uploaded``
+        and is queued again by the next scan.
+        """
+        job = (contract_id, document_id, digest)
+        if job in self.pending:
+            return True
+        try:
+            self.jobs.put_nowait(job)
+        except asyncio.QueueFull:
+            logger.warning(f"Document queue full, {document_id} of {contract_id} will be retried")
+            self.retry.set()
+            return False
+        self.pending.add(job)
+        return True
+
+    async def requeue_unprocessed(self) -> int:
+        """Queue processable documents still ``uploaded``; stops when the queue is full."""
+        db = MongoDB.get_database()
+        queued = 0
+        contracts = db.contracts.find(
+            {"documentsList.status": "uploaded"},
+            {
+                "_id": 0,
+                "id": 1,
+                "documentsList.id": 1,
+                "documentsList.name": 1,
+                "documentsList.type": 1,
+                "documentsList.hash": 1,
+                "documentsList.status": 1,
+            }
+        )
+        async for contract in contracts:
+            for document in contract.get("documentsList", []):
+                if document.get("status") != "uploaded" or not document.get("hash"):
+                    continue
+                if not is_processable(document.get("type"), document.get("name")):
+                    continue
+                if not self.submit(contract["id"], document["id"], document["hash"]):
+                    return queued
+                queued += 1
+        return queued
+
+    async def start(self) -> None:
+        # Forking would copy the running event loop and motor's threads into the workers
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        # Two jobs per worker in flight keeps the pool busy between hand-offs
+        self.tasks = [asyncio.create_task(self._run_jobs()) for _ in range(self.workers * 2)]
+        self.tasks.append(asyncio.create_task(self._write_results()))
+        self.tasks.append(asyncio.create_task(self._requeue_left_behind()))
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        self.pending.clear()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def _run_jobs(self) -> None:
+        loop = asyncio.get_running_loop()
+        db = MongoDB.get_database()
+        path_for = BlobStore(self.blob_root).path_for
+        while True:
+            contract_id, document_id, digest = await self.jobs.get()
+            try:
+                known = await db.document_analysis.find_one({"hash": digest}, {"_id": 0, "text": 0})
+                if known is not None:
+                    result = known
+                else:
+                    result = await loop.run_in_executor(self.executor, process_document, path_for(digest), self.blob_root)
+                    result["hash"] = digest
+                await self.results.put((contract_id, document_id, result, known is None))
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning(f"Processing document {document_id} of {contract_id} failed: {exc}")
+                await self.results.put((contract_id, document_id, {"hash": digest, "error": str(exc)}, False))
+
+    async def _requeue_left_behind(self) -> None:
+        # Uploads queued before the last stop, then anything a full queue turned away
+        while True:
+            try:
+                queued = await self.requeue_unprocessed()
+                if queued:
+                    logger.info(f"Queued {queued} unprocessed document(s)")
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning(f"Scanning for unprocessed documents failed: {exc}")
+                self.retry.set()
+            await self.retry.wait()
+            await asyncio.sleep(DOCUMENT_RETRY_SECONDS)
+            self.retry.clear()
+
+    async def _write_results(self) -> None:
+        while True:
+            batch = [await self.results.get()]
+            deadline = time.monotonic() + DOCUMENT_BATCH_SECONDS
+            while len(batch) < DOCUMENT_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.results.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await write_results(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning(f"Writing {len(batch)} document results failed: {exc}")
+                self.retry.set()
+            finally:
+                for contract_id, document_id, result, _ in batch:
+                    self.pending.discard((contract_id, document_id, result["hash"]))
+
+
+async def write_results(batch: List[Tuple[str, str, Dict[str, Any], bool]]) -> None:
+    """Write a batch of ``(contract_id, document_id, result, is_new)`` with three bulk writes."""
+    db = MongoDB.get_database()
+    # The contract's version changes, so its Last-Modified must move with it
+    now = datetime.utcnow()
+    contract_updates = []
+    analysis_inserts = []
+    document_updates = []
+    for contract_id, document_id, result, is_new in batch:
+        failed = "error" in result
+        fields = {"documentsList.$.status": "failed" if failed else "processed", "updatedAt": now}
+        if not failed:
+            fields.update({
+                "documentsList.$.pages": result.get("pages"),
+                "documentsList.$.dimensions": result.get("dimensions"),
+                "documentsList.$.thumbnailHash": result.get("thumbnailHash"),
+            })
+        contract_updates.append(UpdateOne(
+            # Matching the hash too drops results for a version since replaced
+            {"id": contract_id, "documentsList": {"$elemMatch": {"id": document_id, "hash": result["hash"]}}},
+            {"$set": fields, "$inc": {"version": 1}}
+        ))
+
+        if is_new:
+            analysis_inserts.append(UpdateOne({"hash": result["hash"]}, {"$setOnInsert": result}, upsert=True))
+            document_updates.append(UpdateMany(
+                {"metadata.hash": result["hash"]},
+                {"$set": {
+                    "metadata.pages": result.get("pages"),
+                    "metadata.dimensions": result.get("dimensions"),
+                    "metadata.ocr_text": result.get("text"),
+                }}
+            ))
+
+    if analysis_inserts:
+        await db.document_analysis.bulk_write(analysis_inserts, ordered=False)
+    if document_updates:
+        await db.documents.bulk_write(document_updates, ordered=False)
+    await db.contracts.bulk_write(contract_updates, ordered=False)
+    for contract_id, _, _, _ in batch:
+        invalidate_contract(contract_id)
+
+
+document_processor = DocumentProcessor()
@@ -0,0 +1,216 @@
+"""Resumable upload sessions that write chunks straight into the blob store.
+
+A session reserves a staging file in the blob store and records how many
+bytes have arrived (``offset``) in the ``upload_sessions`` collection, which
+expires sessions through a TTL index. Chunks must arrive in order. A
+request first leases the session, which only succeeds while the session's
+offset is still the chunk's offset, then streams its body straight into the
+staging file at that offset; the offset advances when the body is complete.
+Finalising hashes the staging file and moves it into place under its
+SHA-256 digest.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Optional
+
+from pymongo import ReturnDocument
+
+from db.mongodb import MongoDB
+from services.blob_store import BLOB_CHUNK_SIZE, blob_store
+from utils.ids import new_id
+
+UPLOAD_SESSION_TTL_HOURS = float(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(5 * 1024 ** 3)))
+UPLOAD_MAX_CHUNK_BYTES = int(os.getenv("UPLOAD_MAX_CHUNK_BYTES", str(64 * 1024 ** 2)))
+# How long a request may hold a session while copying a received chunk into it
+UPLOAD_LEASE_SECONDS = float(os.getenv("UPLOAD_LEASE_SECONDS", "60"))
+
+# Staging files of abandoned sessions are swept at most this often
+_STAGING_SWEEP_SECONDS = 3600
+_last_sweep = 0.0
+
+
+class ChunkTooLarge(ValueError):
+    """A chunk would run past the declared size or the per-chunk limit."""
+
+
+def staging_path(session_id: str) -> str:
+    return blob_store.staging_path(f"upload-{session_id}")
+
+
+def _create_empty(path: str) -> None:
+    with open(path, "wb"):
+        pass
+
+
+async def create_session(contract_id: str, user_id: str, name: str, content_type: str,
+                         size: int, sha256: Optional[str]) -> Dict[str, Any]:
+    """Open a session and its empty staging file."""
+    global _last_sweep
+    now = datetime.utcnow()
+    session = {
+        "id": new_id(),
+        "contract_id": contract_id,
+        "user_id": user_id,
+        "name": name,
+        "type": content_type,
+        "size": size,
+        "sha256": sha256,
+        "offset": 0,
+        "createdAt": now,
+        "expiresAt": now + timedelta(hours=UPLOAD_SESSION_TTL_HOURS),
+    }
+    await asyncio.to_thread(_create_empty, staging_path(session["id"]))
+
+    db = MongoDB.get_database()
+    await db.upload_sessions.insert_one(session)
+    session.pop("_id", None)
+
+    if time.monotonic() - _last_sweep > _STAGING_SWEEP_SECONDS:
+        _last_sweep = time.monotonic()
+        await asyncio.to_thread(sweep_staging, UPLOAD_SESSION_TTL_HOURS * 3600)
+    return session
+
+
+async def get_session(session_id: str, contract_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+    """Return a live session owned by this user for this contract."""
+    db = MongoDB.get_database()
+    return await db.upload_sessions.find_one(
+        {"id": session_id, "contract_id": contract_id, "user_id": user_id, "expiresAt": {"$gt": datetime.utcnow()}},
+        {"_id": 0}
+    )
+
+
+async def write_chunk(session: Dict[str, Any], offset: int, chunks: AsyncIterator[bytes]) -> Optional[Dict[str, Any]]:
+    """Stream a request body into the staging file at ``offset`` and advance the session past it.
+
+    The session is leased first, provided its offset is still ``offset`` and
+    no other request holds it. The body is then written straight into the
+    staging file, buffered up to BLOB_CHUNK_SIZE at a time, and the lease is
+    renewed as writing goes on; a request that stalls until its lease lapses
+    stops writing once another request has taken the session. Bytes left by
+    a failed request lie past the session's offset and are overwritten by
+    the retry. Returns the updated session, or None if another request holds
+    or has advanced the session.
+    """
+    limit = min(session["size"] - offset, UPLOAD_MAX_CHUNK_BYTES)
+    db = MongoDB.get_database()
+    lease = new_id()
+    now = datetime.utcnow()
+    claimed = await db.upload_sessions.update_one(
+        {
+            "id": session["id"],
+            "offset": offset,
+            "$or": [{"leaseUntil": None}, {"leaseUntil": {"$lt": now}}],
+        },
+        {"$set": {"lease": lease, "leaseUntil": now + timedelta(seconds=UPLOAD_LEASE_SECONDS)}}
+    )
+    if claimed.matched_count == 0:
+        return None
+
+    renewed_at = time.monotonic()
+
+    async def holds_lease() -> bool:
+        nonlocal renewed_at
+        if time.monotonic() - renewed_at < UPLOAD_LEASE_SECONDS / 2:
+            return True
+        renewed = await db.upload_sessions.update_one(
+            {"id": session["id"], "lease": lease},
+            {"$set": {"leaseUntil": datetime.utcnow() + timedelta(seconds=UPLOAD_LEASE_SECONDS)}}
+        )
+        renewed_at = time.monotonic()
+        return renewed.matched_count == 1
+
+    try:
+        received = 0
+        with open(staging_path(session["id"]), "r+b") as out:
+            out.seek(offset)
+            buffer = bytearray()
+            async for chunk in chunks:
+                if received + len(buffer) + len(chunk) > limit:
+                    raise ChunkTooLarge(f"Chunk exceeds {limit} bytes allowed at offset {offset}")
+                buffer += chunk
+                if len(buffer) >= BLOB_CHUNK_SIZE:
+                    if not await holds_lease():
+                        return None
+                    await asyncio.to_thread(out.write, buffer)
+                    received += len(buffer)
+                    buffer = bytearray()
+            if buffer:
+                if not await holds_lease():
+                    return None
+                await asyncio.to_thread(out.write, buffer)
+                received += len(buffer)
+    except BaseException:
+        await db.upload_sessions.update_one(
+            {"id": session["id"], "lease": lease},
+            {"$set": {"lease": None, "leaseUntil": None}}
+        )
+        raise
+
+    return await db.upload_sessions.find_one_and_update(
+        {"id": session["id"], "lease": lease},
+        {"$set": {"offset": offset + received, "lease": None, "leaseUntil": None}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def _hash_file(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as file:
+        while True:
+            block = file.read(BLOB_CHUNK_SIZE)
+            if not block:
+                break
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+async def finalize_session(session: Dict[str, Any], expected_sha256: str) -> Optional[str]:
+    """Verify the staged bytes against ``expected_sha256`` and commit them as a blob.
+
+    Raises ValueError if the hash does not match; the session is kept so
+    the client can inspect or abort it. Returns None if another request
+    finalised the session first.
+    """
+    path = staging_path(session["id"])
+    digest = await asyncio.to_thread(_hash_file, path)
+    if digest != expected_sha256:
+        raise ValueError(f"SHA-256 mismatch: expected {expected_sha256}, received {digest}")
+
+    # Claim the session so a concurrent finalize cannot commit the same file twice
+    db = MongoDB.get_database()
+    claimed = await db.upload_sessions.delete_one({"id": session["id"]})
+    if claimed.deleted_count == 0:
+        return None
+    await asyncio.to_thread(blob_store.commit, path, digest)
+    return digest
+
+
+async def abort_session(session: Dict[str, Any]) -> None:
+    db = MongoDB.get_database()
+    await db.upload_sessions.delete_one({"id": session["id"]})
+    path = staging_path(session["id"])
+    if os.path.exists(path):
+        await asyncio.to_thread(os.unlink, path)
+
+
+def sweep_staging(max_age_seconds: float) -> int:
+    """Delete upload staging files untouched for ``max_age_seconds``; blocking."""
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for entry in os.scandir(blob_store.staging_dir):
+        if entry.name.startswith("upload-") and entry.stat().st_mtime < cutoff:
+            try:
+                os.unlink(entry.path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
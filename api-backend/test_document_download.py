@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+import requests
+from datetime import datetime
+from urllib.parse import quote
+
+# Test downloading documents whose names are not Latin-1
+def test_non_ascii_download():
+    url = "http://localhost:8000/api"
+
+    # Register a throwaway user
+    print("1. Registering a test user...")
+    register_response = requests.post(f"{url}/auth/register", json={
+        "email": f"download_{datetime.now().timestamp()}@example.com",
+        "password": "testpass123",
+        "firstName": "Download",
+        "lastName": "Test"
+    })
+    if register_response.status_code != 200:
+        print(f"Registration failed: {register_response.status_code}")
+        print(register_response.text)
+        return False
+    headers = {"Authorization": f"Bearer {register_response.json()['access_token']}"}
+
+    print("\n2. Creating a contract...")
+    contract_response = requests.post(f"{url}/contracts", headers=headers, json={
+        "title": "Download test",
+        "type": "Property Sale",
+        "status": "Initiation",
+        "buyer": "Buyer",
+        "seller": "Seller"
+    })
+    if contract_response.status_code != 200:
+        print(f"Creating contract failed: {contract_response.status_code}")
+        print(contract_response.text)
+        return False
+    contract_id = contract_response.json()["id"]
+
+    passed = True
+    for name in ("договор купли-продажи.pdf", "売買契約書.pdf", 'quote " and\r\nnewline.pdf'):
+        print(f"\n3. Uploading and downloading {name!r}...")
+        upload_response = requests.post(
+            f"{url}/contracts/{contract_id}/documents",
+            headers=headers,
+            files={"file": (name, b"%PDF-1.4\n%%EOF\n", "application/pdf")}
+        )
+        if upload_response.status_code != 200:
+            print(f"   Upload failed: {upload_response.status_code}")
+            print(f"   {upload_response.text}")
+            passed = False
+            continue
+        document_id = upload_response.json()["id"]
+
+        download_response = requests.get(f"{url}/contracts/{contract_id}/documents/{document_id}", headers=headers)
+        disposition = download_response.headers.get("Content-Disposition", "")
+        print(f"   Status: {download_response.status_code}")
+        print(f"   Content-Disposition: {disposition}")
+        stored_name = upload_response.json().get("name", name)
+        if download_response.status_code != 200 or f"filename*=UTF-8''{quote(stored_name, safe='')}" not in disposition:
+            print("   FAILED")
+            passed = False
+        else:
+            print("   OK")
+    return passed
+
+if __name__ == "__main__":
+    test_non_ascii_download()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+import requests
+from datetime import datetime
+
+# Test that saving a user with unchanged role and status keeps their tokens valid
+def register(url, role):
+    response = requests.post(f"{url}/auth/register", json={
+        "email": f"{role}_{datetime.now().timestamp()}@example.com",
+        "password": "testpass123",
+        "firstName": "Role",
+        "lastName": "Test",
+        "role": role
+    })
+    if response.status_code != 200:
+        print(f"Registering {role} failed: {response.status_code}")
+        print(response.text)
+        return None
+    return response.json()
+
+def test_role_update():
+    url = "http://localhost:8000/api"
+
+    print("1. Registering an admin and an editor...")
+    admin = register(url, "admin")
+    editor = register(url, "editor")
+    if not admin or not editor:
+        return False
+    admin_headers = {"Authorization": f"Bearer {admin['access_token']}"}
+    editor_headers = {"Authorization": f"Bearer {editor['access_token']}"}
+    editor_url = f"{url}/admin/users/{editor['user']['id']}"
+
+    passed = True
+
+    print("\n2. Saving the editor with the same role and status...")
+    response = requests.put(editor_url, headers=admin_headers, json={
+        "role": "editor",
+        "is_active": True,
+        "firstName": "Renamed"
+    })
+    print(f"   Update status: {response.status_code}")
+    list_response = requests.get(f"{url}/contracts", headers=editor_headers)
+    print(f"   Editor token after unchanged role: {list_response.status_code}")
+    if response.status_code != 200 or list_response.status_code != 200:
+        print("   FAILED: the editor was logged out although nothing changed")
+        passed = False
+
+    print("\n3. Changing the editor's role...")
+    response = requests.put(editor_url, headers=admin_headers, json={"role": "viewer"})
+    print(f"   Update status: {response.status_code}")
+    list_response = requests.get(f"{url}/contracts", headers=editor_headers)
+    print(f"   Editor token after role change: {list_response.status_code}")
+    if response.status_code != 200 or list_response.status_code != 401:
+        print("   FAILED: the old token still works after a role change")
+        passed = False
+
+    print("\nPASSED" if passed else "\nFAILED")
+    return passed
+
+if __name__ == "__main__":
+    test_role_update()
@@ -1,5 +1,9 @@
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Dict, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -7,6 +11,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import os
 from dotenv import load_dotenv
 from db.mongodb import MongoDB
+from utils.cache import TTLCache
 
 load_dotenv()
 
@@ -18,9 +23,110 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt runs on a dedicated pool so a login burst cannot stall the event loop.
+# Jobs beyond PASSWORD_HASH_MAX_PENDING (queued or running) are rejected with a 503.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+password_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+_password_jobs_pending = 0
+
 # Bearer token security
 security = HTTPBearer()
 
+# User record cache used by the role checks below
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_PROJECTION = {"_id": 0, "id": 1, "email": 1, "role": 1, "is_active": 1}
+
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+# Verified token payloads keyed by SHA-256 of the token; entries expire at the token's exp
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+# Token versions: bumping a user's version revokes every token issued before it
+TOKEN_VERSION_REFRESH_SECONDS = float(os.getenv("TOKEN_VERSION_REFRESH_SECONDS", "5"))
+# Writes stamped just before a sync can commit just after it; re-read that window
+TOKEN_VERSION_SYNC_OVERLAP = timedelta(seconds=5)
+REVOKED = -1
+
+
+class TokenVersionRegistry:
+    """In-memory map of per-user token versions mirrored from MongoDB.
+
+    Only users whose version was ever bumped (and deleted users, recorded in
+    ``user_tombstones``) appear in the map; everyone else is at version 0.
+    Refreshes are incremental: each one reads just the users and tombstones
+    changed since the previous sync. Change times are stamped with
+    ``$currentDate`` and the sync point is read from the server too, so app
+    server clocks never enter the comparison.
+    """
+
+    def __init__(self, refresh_interval: float) -> None:
+        self.refresh_interval = refresh_interval
+        self._versions: Dict[str, int] = {}
+        self._synced_until: Optional[datetime] = None
+        self._next_refresh = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self, user_id: str) -> int:
+        """Return the current token version of a user, or REVOKED if the user was deleted."""
+        loop = asyncio.get_running_loop()
+        if loop.time() >= self._next_refresh:
+            async with self._lock:
+                if loop.time() >= self._next_refresh:
+                    await self.refresh()
+                    self._next_refresh = loop.time() + self.refresh_interval
+        return self._versions.get(user_id, 0)
+
+    async def sync(self, user_id: str) -> int:
+        """Refresh now, regardless of the interval, and return the user's version."""
+        async with self._lock:
+            await self.refresh()
+            self._next_refresh = asyncio.get_running_loop().time() + self.refresh_interval
+        return self._versions.get(user_id, 0)
+
+    async def refresh(self) -> None:
+        """Pull version changes and deletions made since the last sync."""
+        db = MongoDB.get_database()
+        started_at = (await db.command("hello"))["localTime"]
+        since = (
+            self._synced_until - TOKEN_VERSION_SYNC_OVERLAP
+            if self._synced_until is not None
+            else datetime.min
+        )
+
+        cursor = db.users.find(
+            {"token_version_changed_at": {"$gte": since}},
+            {"_id": 0, "id": 1, "token_version": 1},
+        )
+        async for user in cursor:
+            self.record(user["id"], user.get("token_version", 0))
+
+        cursor = db.user_tombstones.find({"deleted_at": {"$gte": since}}, {"_id": 0, "id": 1})
+        async for tombstone in cursor:
+            self._versions[tombstone["id"]] = REVOKED
+
+        self._synced_until = started_at
+
+    def record(self, user_id: str, version: int) -> None:
+        """Apply a version seen locally or during a refresh; versions never move backwards."""
+        current = self._versions.get(user_id, 0)
+        if current != REVOKED and version > current:
+            self._versions[user_id] = version
+
+    def revoke(self, user_id: str) -> None:
+        """Reject every token of a deleted user."""
+        self._versions[user_id] = REVOKED
+
+
+token_versions = TokenVersionRegistry(refresh_interval=TOKEN_VERSION_REFRESH_SECONDS)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password."""
     return pwd_context.verify(plain_password, hashed_password)
@@ -29,6 +135,41 @@ def get_password_hash(password: str) -> str:
     """Hash a password."""
     return pwd_context.hash(password)
 
+async def _run_password_job(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a bcrypt call on the password pool, failing fast when the pool is saturated."""
+    global _password_jobs_pending
+
+    if _password_jobs_pending >= PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    _password_jobs_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, func, *args)
+    finally:
+        _password_jobs_pending -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password pool without blocking the event loop."""
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password pool without blocking the event loop."""
+    return await _run_password_job(get_password_hash, password)
+
+def token_claims_for(user: dict) -> dict:
+    """Build the identity, role and token-version claims for a user document."""
+    return {
+        "sub": user["id"],
+        "email": user["email"],
+        "role": user.get("role", "viewer"),
+        "ver": user.get("token_version", 0),
+    }
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -42,10 +183,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 def decode_token(token: str) -> dict:
-    """Decode a JWT token."""
+    """Decode a JWT token, reusing the verified payload of a token seen before."""
+    cache_key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(cache_key)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -53,6 +198,11 @@ def decode_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Never cache past exp so expiry is still enforced on cached tokens
+    if "exp" in payload:
+        token_cache.set(cache_key, payload, ttl=payload["exp"] - time.time())
+    return payload
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """Get the current user from the JWT token."""
     token = credentials.credentials
@@ -68,7 +218,12 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        return {"user_id": user_id, "email": email}
+        return {
+            "user_id": user_id,
+            "email": email,
+            "role": payload.get("role"),
+            "token_version": payload.get("ver"),
+        }
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -76,39 +231,94 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-async def is_admin(current_user: dict = Depends(get_current_user)) -> bool:
-    """Check if the current user is an admin."""
-    db = MongoDB.get_database()
-    users_collection = db.users
-    
-    user = await users_collection.find_one({"id": current_user["user_id"]})
-    return user and user.get("role") == "admin"
+async def get_user_record(user_id: str) -> Optional[dict]:
+    """Get the id/email/role/is_active fields of a user, served from the user cache when possible."""
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
 
-async def get_current_user_with_role(current_user: dict = Depends(get_current_user)) -> dict:
-    """Get the current user with their role."""
     db = MongoDB.get_database()
     users_collection = db.users
-    
-    user = await users_collection.find_one({"id": current_user["user_id"]})
-    if not user:
+
+    user = await users_collection.find_one({"id": user_id}, USER_CACHE_PROJECTION)
+    if user:
+        user_cache.set(user_id, user)
+    return user
+
+def invalidate_user_cache(user_id: str) -> None:
+    """Drop a cached user record after the user document changes."""
+    user_cache.pop(user_id)
+
+def with_token_version_bump(update: dict) -> dict:
+    """Add the operators that revoke a user's outstanding tokens to a Mongo update document."""
+    update.setdefault("$inc", {})["token_version"] = 1
+    update.setdefault("$currentDate", {})["token_version_changed_at"] = True
+    return update
+
+async def resolve_role_from_claims(current_user: dict) -> Optional[str]:
+    """Return the role claimed by the token if its version is current, None if the token has no claims.
+
+    Raises 401 when the token was issued before the user's latest version bump.
+    A token newer than this worker's map was issued after a bump it has not
+    synced yet, so the map is refreshed before deciding.
+    """
+    claimed_role = current_user.get("role")
+    claimed_version = current_user.get("token_version")
+    if claimed_role is None or claimed_version is None:
+        return None
+
+    current_version = await token_versions.get(current_user["user_id"])
+    if current_version != REVOKED and claimed_version > current_version:
+        current_version = await token_versions.sync(current_user["user_id"])
+    if current_version == REVOKED or claimed_version < current_version:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
         )
+    return claimed_role
+
+async def is_admin(current_user: dict = Depends(get_current_user)) -> bool:
+    """Check if the current user is an admin."""
+    role = await resolve_role_from_claims(current_user)
+    if role is not None:
+        return role == "admin"
+
+    user = await get_user_record(current_user["user_id"])
+    return user and user.get("role") == "admin"
+
+async def get_current_user_with_role(current_user: dict = Depends(get_current_user)) -> dict:
+    """Get the current user with their role."""
+    role = await resolve_role_from_claims(current_user)
+    if role is None:
+        # Tokens issued before role claims existed fall back to the user record
+        user = await get_user_record(current_user["user_id"])
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+        role = user.get("role", "viewer")
     
     return {
         "user_id": current_user["user_id"],
         "email": current_user["email"],
-        "role": user.get("role", "viewer"),
-        "is_admin": user.get("role") == "admin"
+        "role": role,
+        "is_admin": role == "admin"
     }
 
 async def require_admin(current_user: dict = Depends(get_current_user)) -> dict:
     """Require the current user to be an admin."""
-    db = MongoDB.get_database()
-    users_collection = db.users
-    
-    user = await users_collection.find_one({"id": current_user["user_id"]})
+    role = await resolve_role_from_claims(current_user)
+    if role is not None:
+        if role != "admin":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Admin access required"
+            )
+        return current_user
+
+    user = await get_user_record(current_user["user_id"])
     if not user or user.get("role") != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
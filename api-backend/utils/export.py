@@ -0,0 +1,56 @@
+"""Incremental NDJSON and CSV encoding of MongoDB cursors.
+
+The encoders pull documents from an async cursor and yield encoded chunks of
+``rows_per_chunk`` rows, so a ``StreamingResponse`` over them holds one chunk
+in memory however many documents the cursor returns.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+from datetime import date, datetime
+from typing import Any, AsyncIterator, List
+
+from utils.responses import dumps
+
+
+async def ndjson_chunks(cursor, fields: List[str], rows_per_chunk: int = 500) -> AsyncIterator[bytes]:
+    """Yield one JSON object per line with exactly ``fields`` as keys."""
+    lines = []
+    async for document in cursor:
+        lines.append(dumps({field: document.get(field) for field in fields}))
+        if len(lines) >= rows_per_chunk:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return dumps(value).decode()
+    return value
+
+
+async def csv_chunks(cursor, fields: List[str], rows_per_chunk: int = 500) -> AsyncIterator[bytes]:
+    """Yield a header row followed by one CSV record per document."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    rows = 0
+    async for document in cursor:
+        writer.writerow([_csv_value(document.get(field)) for field in fields])
+        rows += 1
+        if rows >= rows_per_chunk:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
@@ -0,0 +1,137 @@
+"""Byte-range responses for files on disk that never read whole files into memory.
+
+When the ASGI server offers the ``http.response.pathsend`` extension, full
+responses hand the path to the server, which can use sendfile. Otherwise,
+and for ranges, the file is memory-mapped and sent as ``memoryview`` slices
+of the mapping, so no chunk is copied into a new Python bytes object.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import unicodedata
+from typing import Mapping, Optional, Tuple
+from urllib.parse import quote
+
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+
+def content_disposition(disposition: str, filename: str) -> str:
+    """Build a Content-Disposition value that is safe for any file name.
+
+    ``filename`` is an ASCII fallback with quotes, backslashes and control
+    characters removed; ``filename*`` carries the full name as UTF-8
+    (RFC 6266), which current browsers prefer.
+    """
+    name = "".join(char for char in filename if char.isprintable())
+    fallback = "".join(
+        char if " " <= char <= "~" else "_"
+        for char in unicodedata.normalize("NFKD", name)
+        if not unicodedata.combining(char) and char not in '"\\'
+    )
+    return f"{disposition}; filename=\"{fallback or 'download'}\"; filename*=UTF-8''{quote(name, safe='')}"
+
+
+class RangeNotSatisfiable(ValueError):
+    """The Range header names no byte of the file."""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Return the inclusive ``(start, end)`` of a single-range ``Range`` header.
+
+    Returns None when the whole file should be sent: no header, a unit other
+    than bytes, several ranges or a malformed value (RFC 9110 lets servers
+    ignore those). Raises RangeNotSatisfiable when the range is past the end.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec or "-" not in spec:
+        return None
+    first, last = (part.strip() for part in spec.split("-", 1))
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if start < 0 or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def range_applies(headers: Mapping[str, str], etag: str) -> bool:
+    """Check If-Range: a Range is only honoured while the client's copy is current."""
+    if_range = headers.get("if-range")
+    return if_range is None or if_range.strip() == etag
+
+
+class RangeFileResponse(Response):
+    """Send all of a file, or the inclusive byte range ``byte_range`` of it."""
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        size: int,
+        byte_range: Optional[Tuple[int, int]] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+    ):
+        self.path = path
+        self.size = size
+        self.byte_range = byte_range
+        self.media_type = media_type
+        self.background = None
+        start, end = byte_range if byte_range else (0, size - 1)
+        self.start = start
+        self.length = end - start + 1 if size else 0
+        self.status_code = 206 if byte_range else 200
+        self.init_headers(headers)
+        self.headers["accept-ranges"] = "bytes"
+        self.headers["content-length"] = str(self.length)
+        if byte_range:
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope.get("method") == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if self.byte_range is None and "http.response.pathsend" in scope.get("extensions", {}):
+            await send({"type": "http.response.pathsend", "path": os.path.abspath(self.path)})
+            return
+
+        with open(self.path, "rb") as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapping)
+        try:
+            offset = self.start
+            end = self.start + self.length
+            while offset < end:
+                chunk_end = min(offset + self.chunk_size, end)
+                await send({
+                    "type": "http.response.body",
+                    "body": view[offset:chunk_end],
+                    "more_body": chunk_end < end,
+                })
+                offset = chunk_end
+        finally:
+            view.release()
+            try:
+                mapping.close()
+            except BufferError:
+                # The server still holds a slice it has not written yet; the
+                # mapping is unmapped once that slice is released
+                pass
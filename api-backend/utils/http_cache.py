@@ -0,0 +1,98 @@
+"""Helpers for conditional requests (ETag / If-None-Match / If-Modified-Since / If-Match)."""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+
+from starlette.responses import Response
+
+
+def entity_etag(version: int, updated_at: Optional[datetime]) -> str:
+    """Strong ETag for a stored document from its version counter and last update time."""
+    millis = int(updated_at.replace(tzinfo=timezone.utc).timestamp() * 1000) if updated_at else 0
+    return f'"{version}-{millis:x}"'
+
+
+def if_match_version(headers: Mapping[str, str]) -> Optional[int]:
+    """Return the version named by an If-Match header issued from ``entity_etag``.
+
+    Returns None when the header is absent or ``*``. Raises ValueError for
+    weak or foreign tags, which can never match and so mean 412.
+    """
+    header = headers.get("if-match")
+    if header is None or header.strip() == "*":
+        return None
+    tag = header.split(",")[0].strip()
+    if not (tag.startswith('"') and tag.endswith('"')):
+        raise ValueError("If-Match requires a strong entity tag")
+    return int(tag[1:-1].split("-", 1)[0])
+
+
+def content_etag(body: bytes) -> str:
+    """Weak ETag derived from a rendered response body."""
+    return f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def format_http_date(value: datetime) -> str:
+    """Format a naive UTC datetime as an HTTP date."""
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header value against an ETag."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def is_not_modified(headers: Mapping[str, str], etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Decide whether a GET can be answered with 304.
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted when
+    the client sent no entity tags, as RFC 9110 requires.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have one-second resolution
+        modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+        return modified <= since
+    return False
+
+
+def cache_validator_headers(etag: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    """Headers that let clients revalidate a per-user response on every poll."""
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Vary": "Authorization",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_http_date(last_modified)
+    return headers
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    """Empty 304 response carrying the current validators."""
+    return Response(status_code=304, headers=cache_validator_headers(etag, last_modified))
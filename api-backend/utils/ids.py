@@ -0,0 +1,84 @@
+"""Sortable, collision-free identifiers generated without a database round trip.
+
+An id packs 100 bits into 20 Crockford base32 characters:
+
+- 48 bits: milliseconds since the Unix epoch
+- 12 bits: sequence number within that millisecond
+- 40 bits: random node id, drawn per process (and again after a fork)
+
+Ids from one process are strictly increasing. Ids from different processes
+sort by creation time to the millisecond, and only collide if two processes
+draw the same 40-bit node id and use the same millisecond and sequence
+number. Because the encoding has a fixed width and the alphabet is in
+ASCII order, string order matches numeric order.
+"""
+
+from __future__ import annotations
+
+import os
+import secrets
+import threading
+import time
+
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ID_LENGTH = 20
+
+SEQUENCE_BITS = 12
+NODE_BITS = 40
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+# Ids are encoded two characters (10 bits) at a time, most significant first
+_PAIRS = [first + second for first in ALPHABET for second in ALPHABET]
+_PAIR_SHIFTS = tuple(range(ID_LENGTH * 5 - 10, -1, -10))
+
+
+class IdGenerator:
+    """Thread-safe generator of monotonic ids for one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_millis = 0
+        self._sequence = 0
+        self._node = secrets.randbits(NODE_BITS)
+
+    def reseed(self) -> None:
+        """Draw a new node id; called in forked children so they never share the parent's."""
+        self._lock = threading.Lock()
+        self._node = secrets.randbits(NODE_BITS)
+
+    def next(self) -> str:
+        with self._lock:
+            millis = time.time_ns() // 1_000_000
+            if millis > self._last_millis:
+                self._last_millis = millis
+                self._sequence = 0
+            elif self._sequence < MAX_SEQUENCE:
+                # Same millisecond, or the clock went backwards: keep counting
+                self._sequence += 1
+            else:
+                # Sequence exhausted: borrow the next millisecond
+                self._last_millis += 1
+                self._sequence = 0
+            value = (
+                (self._last_millis << (SEQUENCE_BITS + NODE_BITS))
+                | (self._sequence << NODE_BITS)
+                | self._node
+            )
+
+        return "".join([_PAIRS[(value >> shift) & 1023] for shift in _PAIR_SHIFTS])
+
+
+_generator = IdGenerator()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_generator.reseed)
+
+
+def new_id(prefix: str = "") -> str:
+    """Return a new unique id, optionally prefixed (e.g. ``"CNT-"``)."""
+    return prefix + _generator.next()
+
+
+def new_contract_id() -> str:
+    """Return a new contract id such as ``CNT-06GMWFWA9W00QZJDH19X``."""
+    return new_id("CNT-")
+
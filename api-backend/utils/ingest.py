@@ -0,0 +1,98 @@
+"""Incremental parsing of NDJSON and CSV request bodies.
+
+Both parsers consume the body as an async stream of byte chunks and yield
+one row at a time, so memory use does not depend on the upload size. Rows
+are yielded as ``(row_number, row, error)``: ``row`` is a dict when the row
+parsed and ``error`` describes the problem when it did not.
+"""
+
+from __future__ import annotations
+
+import csv
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import orjson
+
+Row = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into decoded lines without their line endings."""
+    buffer = b""
+    first = True
+    async for chunk in chunks:
+        buffer += chunk
+        if first and len(buffer) >= 3:
+            # Spreadsheet exports often start with a UTF-8 byte order mark
+            buffer = buffer.removeprefix(b"\xef\xbb\xbf")
+            first = False
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r").decode("utf-8", errors="replace")
+    if first:
+        buffer = buffer.removeprefix(b"\xef\xbb\xbf")
+    if buffer:
+        yield buffer.rstrip(b"\r").decode("utf-8", errors="replace")
+
+
+async def iter_ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Row]:
+    """Yield one JSON object per non-blank line."""
+    row_number = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            row = orjson.loads(line)
+        except orjson.JSONDecodeError as exc:
+            yield row_number, None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(row, dict):
+            yield row_number, None, "Each line must be a JSON object"
+            continue
+        yield row_number, row, None
+
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Row]:
+    """Yield one dict per CSV record, keyed by the header row.
+
+    Empty cells are left out so model defaults apply. Quoted cells may span
+    lines: a record ends at the first line break outside quotes, which is
+    where the running count of quote characters is even.
+    """
+    header = None
+    record = []
+    quotes = 0
+    row_number = 0
+    async for line in iter_lines(chunks):
+        record.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        text = "\n".join(record)
+        record, quotes = [], 0
+        if not text.strip():
+            continue
+
+        try:
+            values = next(csv.reader([text]))
+        except csv.Error as exc:
+            if header is None:
+                raise ValueError(f"Invalid CSV header: {exc}") from exc
+            row_number += 1
+            yield row_number, None, f"Invalid CSV: {exc}"
+            continue
+
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+
+        row_number += 1
+        if len(values) > len(header):
+            yield row_number, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield row_number, {name: value for name, value in zip(header, values) if value != ""}, None
+
+    if record:
+        row_number += 1
+        yield row_number, None, "Unterminated quoted field"
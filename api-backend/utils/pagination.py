@@ -0,0 +1,83 @@
+"""Opaque keyset cursors for list endpoints.
+
+A cursor pins a position in a list sorted by ``(sort field, id)``. Because
+the position is a key rather than an offset, fetching the next page costs
+the same on page 500 as on page 1 and rows inserted concurrently do not
+shift the pages.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+def encode_cursor(sort_field: str, sort_order: str, value: Any, doc_id: str, before: bool = False) -> str:
+    """Encode a position as an opaque, URL-safe cursor string."""
+    payload: Dict[str, Any] = {"f": sort_field, "o": sort_order, "id": doc_id, "b": before}
+    if isinstance(value, datetime):
+        payload["dt"] = value.isoformat()
+    else:
+        payload["v"] = value
+
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_field: str, sort_order: str) -> Dict[str, Any]:
+    """Decode a cursor produced by ``encode_cursor`` for the same sort.
+
+    Raises ValueError if the cursor is malformed or was issued for a
+    different sort field or order.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = datetime.fromisoformat(payload["dt"]) if "dt" in payload else payload.get("v")
+        decoded = {
+            "field": payload["f"],
+            "order": payload["o"],
+            "value": value,
+            "id": payload["id"],
+            "before": bool(payload.get("b", False)),
+        }
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError("Malformed cursor") from exc
+
+    if decoded["field"] != sort_field or decoded["order"] != sort_order:
+        raise ValueError("Cursor does not match the requested sort")
+    return decoded
+
+
+def keyset_filter(field: str, value: Any, doc_id: str, greater: bool) -> Dict[str, Any]:
+    """Match rows strictly after (``greater``) or before ``(value, doc_id)`` in ascending order.
+
+    MongoDB sorts missing and null values before everything else, so they
+    are handled explicitly; range operators alone never match them.
+    """
+    op = "$gt" if greater else "$lt"
+    if value is None:
+        tie = {field: None, "id": {op: doc_id}}
+        if greater:
+            return {"$or": [tie, {field: {"$ne": None}}]}
+        return tie
+
+    clauses = [
+        {field: {op: value}},
+        {field: value, "id": {op: doc_id}},
+    ]
+    if not greater:
+        clauses.append({field: None})
+    return {"$or": clauses}
+
+
+def merge_filters(*filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """AND together non-empty query documents."""
+    parts = [f for f in filters if f]
+    if not parts:
+        return {}
+    if len(parts) == 1:
+        return parts[0]
+    return {"$and": parts}
@@ -0,0 +1,45 @@
+"""Response classes shared by the ESCRa routers."""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from bson import Decimal128, ObjectId
+from starlette.responses import JSONResponse
+
+
+def _orjson_default(obj: Any) -> Any:
+    """Serialise the BSON and Python types orjson does not handle natively."""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal128):
+        return str(obj.to_decimal())
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content exactly as ORJSONResponse renders it."""
+    return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    datetime, date, UUID and Enum values are encoded natively (naive datetimes
+    keep the same ISO format as ``datetime.isoformat``) and ObjectId becomes
+    its hex string. Returning this response directly from a route also skips
+    FastAPI's ``jsonable_encoder`` pass and response_model validation.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)